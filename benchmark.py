@@ -0,0 +1,495 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import main
+
+# --- Benchmark Settings ---
+BENCHMARK_SIZES = "10k"                # Rows in each of files, entities and metadata; comma-separated, k/M suffixes
+BENCHMARK_SEED = 4                     # Seed of the synthetic data generator; same seed and size = same dump
+BENCHMARK_REPEAT = 3                   # Runs per stage; the fastest run is the reported result
+BENCHMARK_DUMP_DIR = 'benchmark_data'  # Generated dumps are kept here and reused by later runs
+BENCHMARK_RESULTS_FILE = 'benchmark_results.json'
+BENCHMARK_REGRESSION_TOLERANCE = 0.10  # --compare flags stages more than this much slower than the baseline
+BENCHMARK_MICRO_ROWS = 50000           # Rows per table sampled by the row-conversion and datetime micro-benchmarks
+BENCHMARK_DATETIME_BLOCK_ROWS = 1000   # Values per call of the batch datetime API (one fetched row block)
+# --- End Benchmark Settings ---
+
+BENCHMARK_FORMAT_VERSION = 1
+BENCHMARK_TABLES = ['files', 'entities', 'metadata']
+
+# Cloudreve v4 (ent) schema of the benchmarked tables, as sqlite3 .dump writes it.
+SYNTHETIC_SCHEMA_SQL = """CREATE TABLE `files` (`id` integer NOT NULL PRIMARY KEY AUTOINCREMENT, `created_at` datetime NOT NULL, `updated_at` datetime NOT NULL, `deleted_at` datetime NULL, `type` integer NOT NULL, `name` text NOT NULL, `size` integer NOT NULL DEFAULT (0), `primary_entity` integer NULL, `is_symbolic` bool NOT NULL DEFAULT (false), `props` json NULL, `storage_policy_files` integer NULL, `file_children` integer NULL, `owner_id` integer NOT NULL);
+CREATE TABLE `entities` (`id` integer NOT NULL PRIMARY KEY AUTOINCREMENT, `created_at` datetime NOT NULL, `updated_at` datetime NOT NULL, `deleted_at` datetime NULL, `type` integer NOT NULL, `source` text NOT NULL, `size` integer NOT NULL, `reference_count` integer NOT NULL DEFAULT (1), `storage_policy_entities` integer NOT NULL, `created_by` integer NULL, `upload_session_id` uuid NULL, `recycle_options` json NULL);
+CREATE TABLE `metadata` (`id` integer NOT NULL PRIMARY KEY AUTOINCREMENT, `created_at` datetime NOT NULL, `updated_at` datetime NOT NULL, `deleted_at` datetime NULL, `name` text NOT NULL, `value` text NOT NULL, `is_public` bool NOT NULL DEFAULT (false), `file_id` integer NOT NULL);
+"""
+SYNTHETIC_INDEX_SQL = """CREATE UNIQUE INDEX `file_file_children_name` ON `files` (`file_children`, `name`);
+CREATE INDEX `file_file_children_type_updated_at` ON `files` (`file_children`, `type`, `updated_at`);
+CREATE INDEX `entity_created_by` ON `entities` (`created_by`);
+CREATE UNIQUE INDEX `metadata_file_id_name` ON `metadata` (`file_id`, `name`);
+"""
+SYNTHETIC_METADATA_NAMES = ['sys:thumb_disabled', 'tag:work', 'sys:shared_redirect', 'thumb:width']
+SYNTHETIC_FILE_NAMES = ['report {0}.pdf', 'IMG_{0}.jpg', '会议记录 {0}.docx', "O'Neil notes {0}.txt", 'backup\\{0}.tar.gz']
+
+
+def parse_benchmark_size(size_text):
+    """'10k' -> 10000, '1M' -> 1000000, '2500' -> 2500."""
+    size_text = size_text.strip()
+    multiplier = {'k': 1000, 'm': 1000000}.get(size_text[-1:].lower(), 1)
+    return int(float(size_text[:-1] if multiplier > 1 else size_text) * multiplier)
+
+
+def _sqlite_literal(value):
+    if value is None:
+        return "NULL"
+    if isinstance(value, bytes):
+        return "X'" + value.hex() + "'"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def _go_timestamp(rng, epoch_seconds):
+    """A timestamp in one of the Go time.Time formats found in Cloudreve databases."""
+    base = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch_seconds))
+    pick = rng.random()
+    if pick < 0.8:
+        return f"{base}.{rng.randrange(10 ** 9):09d}+08:00"
+    if pick < 0.95:
+        return f"{base}.{rng.randrange(10 ** 6):06d} +0800 CST m=+{rng.random() * 100:.9f}"
+    return base.replace(" ", "T") + "Z"
+
+
+def _json_value(rng, json_text):
+    """JSON columns hold text in most rows and a blob in some, as written by different Cloudreve versions."""
+    return json_text.encode('utf-8') if rng.random() < 0.2 else json_text
+
+
+def generate_synthetic_dump(dump_path, rows, seed):
+    """Writes a SQLite text dump with `rows` rows in each of files, entities and metadata.
+
+    The values exercise every conversion path of the migration: boolean columns as integers
+    and as 'true'/'false' strings, Go-style timestamps, JSON as text and as blobs, UUIDs and
+    text with quotes, backslashes and non-ASCII characters. The output only depends on rows and seed.
+    """
+    rng = random.Random(seed)
+    epoch_start = 1672531200  # 2023-01-01
+    temp_dump_path = dump_path + ".partial"
+    with open(temp_dump_path, 'w', encoding='utf-8', newline='\n') as dump_file:
+        dump_file.write("PRAGMA foreign_keys=OFF;\nBEGIN TRANSACTION;\n")
+        dump_file.write(SYNTHETIC_SCHEMA_SQL)
+        for row_id in range(1, rows + 1):
+            created_at = epoch_start + row_id * 7 + rng.randrange(7)
+            is_folder = row_id % 10 == 1
+            parent_id = None if row_id == 1 else 1 if is_folder else (row_id - 1) // 10 * 10 + 1
+            file_name = SYNTHETIC_FILE_NAMES[row_id % len(SYNTHETIC_FILE_NAMES)].format(row_id)
+            props = None
+            if rng.random() < 0.3:
+                props = _json_value(rng, json.dumps({'view': {'layout': rng.choice(['grid', 'list']), 'page_size': 100}}))
+            is_symbolic = rng.choice([0, 0, 0, 1]) if row_id % 50 else rng.choice(['true', 'false'])
+            file_values = [
+                row_id, _go_timestamp(rng, created_at), _go_timestamp(rng, created_at + 60),
+                _go_timestamp(rng, created_at + 3600) if rng.random() < 0.05 else None,
+                1 if is_folder else 0, file_name, 0 if is_folder else rng.randrange(1, 1 << 32),
+                None if is_folder else row_id, is_symbolic, props, 1,
+                parent_id, rng.randrange(1, 101),
+            ]
+            dump_file.write("INSERT INTO files VALUES(" + ",".join(_sqlite_literal(value) for value in file_values) + ");\n")
+        for row_id in range(1, rows + 1):
+            created_at = epoch_start + row_id * 7 + rng.randrange(7)
+            recycle_options = _json_value(rng, '{"unlink_only":false}') if rng.random() < 0.1 else None
+            upload_session_id = str(uuid.UUID(int=rng.getrandbits(128), version=4)) if rng.random() < 0.05 else None
+            entity_values = [
+                row_id, _go_timestamp(rng, created_at), _go_timestamp(rng, created_at + 5),
+                None, rng.choice([0, 0, 0, 1, 2]),
+                f"uploads/{rng.randrange(1, 101)}/{time.strftime('%Y/%m', time.gmtime(created_at))}/{row_id}_{uuid.UUID(int=rng.getrandbits(128), version=4).hex}",
+                rng.randrange(1, 1 << 32), 1 if row_id % 50 else 'true', 1, rng.randrange(1, 101),
+                upload_session_id, recycle_options,
+            ]
+            dump_file.write("INSERT INTO entities VALUES(" + ",".join(_sqlite_literal(value) for value in entity_values) + ");\n")
+        for row_id in range(1, rows + 1):
+            created_at = epoch_start + row_id * 7 + rng.randrange(7)
+            metadata_value = str(rng.randrange(64, 2048)) if row_id % 4 == 0 else "true" if row_id % 4 == 1 else f"https://example.com/s/{row_id}"
+            if rng.random() < 0.05:
+                metadata_value = metadata_value.encode('utf-8')
+            metadata_values = [
+                row_id, _go_timestamp(rng, created_at), _go_timestamp(rng, created_at),
+                None, SYNTHETIC_METADATA_NAMES[row_id % len(SYNTHETIC_METADATA_NAMES)], metadata_value,
+                rng.choice([0, 1]) if row_id % 50 else 'false', (row_id - 1) // len(SYNTHETIC_METADATA_NAMES) + 1,
+            ]
+            dump_file.write("INSERT INTO metadata VALUES(" + ",".join(_sqlite_literal(value) for value in metadata_values) + ");\n")
+        dump_file.write("DELETE FROM sqlite_sequence;\n")
+        for table_name in BENCHMARK_TABLES:
+            dump_file.write(f"INSERT INTO sqlite_sequence VALUES('{table_name}',{rows});\n")
+        dump_file.write(SYNTHETIC_INDEX_SQL)
+        dump_file.write("COMMIT;\n")
+    os.replace(temp_dump_path, dump_path)
+    return os.path.getsize(dump_path)
+
+
+def ensure_synthetic_dump(dump_dir, rows, seed):
+    """Returns the path of the dump for (rows, seed), generating it on first use."""
+    os.makedirs(dump_dir, exist_ok=True)
+    dump_path = os.path.join(dump_dir, f"cloudreve_{rows}_seed{seed}.sql")
+    if os.path.exists(dump_path):
+        print(f"Reusing synthetic dump '{dump_path}'.")
+        return dump_path
+    print(f"Generating synthetic dump '{dump_path}' ({rows} rows per table)...")
+    started_at = time.perf_counter()
+    dump_bytes = generate_synthetic_dump(dump_path, rows, seed)
+    print(f"  Generated {dump_bytes / 1048576:.1f} MiB in {time.perf_counter() - started_at:.2f}s.")
+    return dump_path
+
+
+def stage_result(run_seconds, rows, data_bytes=None, **details):
+    """Summarizes the runs of one stage; the fastest run is the one compared between results."""
+    best_seconds = min(run_seconds)
+    result = {
+        'seconds': round(best_seconds, 4),
+        'runs': [round(seconds, 4) for seconds in run_seconds],
+        'rows': rows,
+        'rows_per_second': round(rows / best_seconds, 1) if best_seconds > 0 else None,
+    }
+    if data_bytes is not None:
+        result['bytes'] = data_bytes
+        result['mib_per_second'] = round(data_bytes / 1048576 / best_seconds, 2) if best_seconds > 0 else None
+    result.update(details)
+    return result
+
+
+def count_source_rows(sqlite_conn):
+    return sum(sqlite_conn.execute(f'SELECT COUNT(*) FROM "{table_name}";').fetchone()[0] for table_name in BENCHMARK_TABLES)
+
+
+def benchmark_dump_load(dump_path, repeat):
+    """Times main.load_sqlite_dump into a fresh temporary database; keeps the last one for later stages."""
+    run_seconds = []
+    sqlite_db_path = None
+    for _ in range(repeat):
+        if sqlite_db_path:
+            os.remove(sqlite_db_path)
+        db_fd, sqlite_db_path = tempfile.mkstemp(suffix=".sqlite", prefix="benchmark_")
+        os.close(db_fd)
+        sqlite_conn = sqlite3.connect(sqlite_db_path)
+        try:
+            started_at = time.perf_counter()
+            main.load_sqlite_dump(sqlite_conn, dump_path)
+            run_seconds.append(time.perf_counter() - started_at)
+            source_rows = count_source_rows(sqlite_conn)
+        finally:
+            sqlite_conn.close()
+    return stage_result(run_seconds, source_rows, os.path.getsize(dump_path)), sqlite_db_path
+
+
+def benchmark_conversion(sqlite_db_path, repeat):
+    """Reads and converts every row exactly like a migration, into a sink that only counts them."""
+    sqlite_conn = main.open_sqlite_source_db(sqlite_db_path)
+    try:
+        sqlite_cursor = sqlite_conn.cursor()
+        table_specs = [main.create_mysql_table(sqlite_cursor, None, table_name, recreate=False) for table_name in BENCHMARK_TABLES]
+        run_seconds = []
+        best_table_results = None
+        for _ in range(repeat):
+            main._preprocess_mysql_datetime_string_cached.cache_clear()  # Every run starts with a cold datetime cache
+            table_results = {}
+            started_at = time.perf_counter()
+            for table_spec in table_specs:
+                row_converter_plan = main.build_row_converter_plan(table_spec['table_name'], table_spec['column_names'],
+                                                                   table_spec['mysql_column_types'])
+                table_metrics = main.new_table_metrics(table_spec['table_name'])
+                pipeline_metrics = main.new_pipeline_metrics() if main.PIPELINE_ENABLED else None
+                table_started_at = time.perf_counter()
+                rows_converted = 0
+                for _, mysql_rows in main.iter_converted_row_blocks(sqlite_cursor, table_spec, None, row_converter_plan,
+                                                                    table_metrics, pipeline_metrics):
+                    rows_converted += len(mysql_rows)
+                table_results[table_spec['table_name']] = {
+                    'rows': rows_converted,
+                    'seconds': round(time.perf_counter() - table_started_at, 4),
+                    'read_seconds': round(table_metrics['read_seconds'], 4),
+                    'convert_seconds': {kind: round(seconds, 4) for kind, seconds in table_metrics['convert_seconds'].items()},
+                }
+            run_seconds.append(time.perf_counter() - started_at)
+            if run_seconds[-1] == min(run_seconds):
+                best_table_results = table_results
+        sqlite_cursor.close()
+    finally:
+        sqlite_conn.close()
+    return stage_result(run_seconds, sum(result['rows'] for result in best_table_results.values()), tables=best_table_results)
+
+
+def convert_row_per_cell_baseline(sqlite_row_tuple, table_name, column_names, schema_info):
+    """The conversion loop migrate_data() used before the converter plan, kept as the reference for
+    the row-conversion micro-benchmark: it rescans schema_info and maps the column type for every cell."""
+    mysql_row_values = list(sqlite_row_tuple)
+    for i, col_name in enumerate(column_names):
+        original_sqlite_type = ""
+        is_pk_col_runtime = False
+        for sch_col_info in schema_info:
+            if sch_col_info[1] == col_name:
+                original_sqlite_type = sch_col_info[2]
+                is_pk_col_runtime = (sch_col_info[5] > 0)
+                break
+
+        mysql_target_type_for_col = main.get_mysql_column_type(original_sqlite_type, col_name, table_name, is_pk_col_runtime)
+        current_val = mysql_row_values[i]
+
+        if mysql_target_type_for_col == "TINYINT(1)":
+            if current_val == 1 or (isinstance(current_val, str) and current_val.lower() in ['true', 't', '1']):
+                mysql_row_values[i] = 1
+            elif current_val == 0 or (isinstance(current_val, str) and current_val.lower() in ['false', 'f', '0']):
+                mysql_row_values[i] = 0
+        elif mysql_target_type_for_col.upper().startswith("TIMESTAMP") or \
+                mysql_target_type_for_col.upper().startswith("DATETIME"):
+            mysql_row_values[i] = main._preprocess_mysql_datetime_string_slow(current_val) \
+                if isinstance(current_val, str) else None
+        elif isinstance(current_val, bytes) and (mysql_target_type_for_col == "JSON" or
+                                                 "TEXT" in mysql_target_type_for_col.upper() or
+                                                 "CHAR" in mysql_target_type_for_col.upper()):
+            mysql_row_values[i] = current_val.decode('utf-8', 'replace')
+    return tuple(mysql_row_values)
+
+
+def read_sample_rows(sqlite_conn, table_name, column_names, sample_rows):
+    select_cols_str_sqlite = ", ".join([f'"{c}"' for c in column_names])
+    return sqlite_conn.execute(f'SELECT {select_cols_str_sqlite} FROM "{table_name}" LIMIT ?;', (sample_rows,)).fetchall()
+
+
+def benchmark_row_conversion(sqlite_db_path, repeat, sample_rows):
+    """Converts the same in-memory rows with the old per-cell loop and with the converter plan.
+
+    Reading is left out, so the two stages compare conversion alone. Both must give the same rows.
+    """
+    sqlite_conn = main.open_sqlite_source_db(sqlite_db_path)
+    try:
+        sqlite_cursor = sqlite_conn.cursor()
+        samples = []
+        for table_name in BENCHMARK_TABLES:
+            table_spec = main.create_mysql_table(sqlite_cursor, None, table_name, recreate=False)
+            sqlite_cursor.execute(f'PRAGMA table_info("{table_name}");')
+            schema_info = sqlite_cursor.fetchall()
+            samples.append((table_name, table_spec['column_names'], schema_info,
+                            main.build_row_converter_plan(table_name, table_spec['column_names'], table_spec['mysql_column_types']),
+                            read_sample_rows(sqlite_conn, table_name, table_spec['column_names'], sample_rows)))
+        sqlite_cursor.close()
+    finally:
+        sqlite_conn.close()
+    total_rows = sum(len(sample[4]) for sample in samples)
+
+    baseline_seconds, plan_seconds = [], []
+    outputs_match = True
+    for _ in range(repeat):
+        main._preprocess_mysql_datetime_string_cached.cache_clear()
+        started_at = time.perf_counter()
+        baseline_rows = [[convert_row_per_cell_baseline(row, table_name, column_names, schema_info) for row in rows]
+                         for table_name, column_names, schema_info, _, rows in samples]
+        baseline_seconds.append(time.perf_counter() - started_at)
+        started_at = time.perf_counter()
+        plan_rows = [main.convert_rows(row_converter_plan, rows) for _, _, _, row_converter_plan, rows in samples]
+        plan_seconds.append(time.perf_counter() - started_at)
+        outputs_match = outputs_match and baseline_rows == plan_rows
+    return {
+        'row_convert_per_cell': stage_result(baseline_seconds, total_rows),
+        'row_convert_plan': stage_result(plan_seconds, total_rows, speedup=round(min(baseline_seconds) / min(plan_seconds), 2),
+                                         outputs_match=outputs_match),
+    }
+
+
+def benchmark_datetime_normalization(sqlite_db_path, repeat, sample_rows):
+    """Times the general datetime parser against the cached fast path and the batch API.
+
+    The samples are the datetime columns of the synthetic tables. The LRU cache is cleared
+    before every run, so repeated values only hit it the way they would in one migration.
+    """
+    sqlite_conn = main.open_sqlite_source_db(sqlite_db_path)
+    try:
+        datetime_values = []
+        for table_name in BENCHMARK_TABLES:
+            for column_name in ['created_at', 'updated_at', 'deleted_at']:
+                datetime_values.extend(row[0] for row in read_sample_rows(sqlite_conn, table_name, [column_name], sample_rows))
+    finally:
+        sqlite_conn.close()
+
+    slow_parse = main._preprocess_mysql_datetime_string_slow
+    slow_seconds, cached_seconds, batch_seconds = [], [], []
+    outputs_match = True
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        slow_results = [slow_parse(value) if isinstance(value, str) else None for value in datetime_values]
+        slow_seconds.append(time.perf_counter() - started_at)
+
+        main._preprocess_mysql_datetime_string_cached.cache_clear()
+        started_at = time.perf_counter()
+        cached_results = [main.preprocess_mysql_datetime_string(value) for value in datetime_values]
+        cached_seconds.append(time.perf_counter() - started_at)
+
+        main._preprocess_mysql_datetime_string_cached.cache_clear()
+        started_at = time.perf_counter()
+        batch_results = []
+        for block_start in range(0, len(datetime_values), BENCHMARK_DATETIME_BLOCK_ROWS):
+            batch_results.extend(main.preprocess_mysql_datetime_strings(
+                datetime_values[block_start:block_start + BENCHMARK_DATETIME_BLOCK_ROWS]))
+        batch_seconds.append(time.perf_counter() - started_at)
+        outputs_match = outputs_match and slow_results == cached_results == batch_results
+    value_count = len(datetime_values)
+    return {
+        'datetime_general_parser': stage_result(slow_seconds, value_count),
+        'datetime_cached': stage_result(cached_seconds, value_count, speedup=round(min(slow_seconds) / min(cached_seconds), 2),
+                                        outputs_match=outputs_match),
+        'datetime_batch': stage_result(batch_seconds, value_count, speedup=round(min(slow_seconds) / min(batch_seconds), 2),
+                                       outputs_match=outputs_match),
+    }
+
+
+def benchmark_mysql_load(sqlite_db_path, repeat):
+    """Runs the full migration of the loaded database into the configured MySQL/MariaDB database.
+
+    Every run drops and recreates the benchmark tables there, so point it at a scratch database.
+    """
+    run_seconds = []
+    best_phases = None
+    main.SQLITE_SOURCE_DB = sqlite_db_path
+    for _ in range(repeat):
+        run_metrics = main.new_run_metrics()
+        journal_fd, main.CHECKPOINT_JOURNAL_FILE = tempfile.mkstemp(suffix=".sqlite", prefix="benchmark_journal_")
+        os.close(journal_fd)
+        try:
+            started_at = time.perf_counter()
+            migrated_tables_info = main.migrate_data(run_metrics=run_metrics)
+            main.reset_mysql_auto_increment(migrated_tables_info, run_metrics)
+            run_seconds.append(time.perf_counter() - started_at)
+        finally:
+            os.remove(main.CHECKPOINT_JOURNAL_FILE)
+        if not migrated_tables_info:
+            raise RuntimeError("Migration into MySQL failed; see the output above.")
+        if run_seconds[-1] == min(run_seconds):
+            best_phases = {phase_name: round(seconds, 4) for phase_name, seconds in run_metrics['phases']}
+    sqlite_conn = sqlite3.connect(sqlite_db_path)
+    try:
+        source_rows = count_source_rows(sqlite_conn)
+    finally:
+        sqlite_conn.close()
+    return stage_result(run_seconds, source_rows, phases=best_phases, workers=main.MIGRATION_WORKERS)
+
+
+def git_commit_of(path):
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=path, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, seed, repeat, dump_dir, with_mysql, micro_rows=BENCHMARK_MICRO_ROWS):
+    results = {
+        'format_version': BENCHMARK_FORMAT_VERSION,
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'environment': {
+            'git_commit': git_commit_of(os.path.dirname(os.path.abspath(__file__))),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'settings': {
+            'seed': seed,
+            'repeat': repeat,
+            'migration_workers': main.MIGRATION_WORKERS,
+            'pipeline_enabled': main.PIPELINE_ENABLED,
+            'insert_batch_rows': main.INSERT_BATCH_ROWS,
+            'load_data_tables': sorted(main.LOAD_DATA_TABLES),
+            'micro_rows': micro_rows,
+        },
+        'datasets': {},
+    }
+    for rows in sizes:
+        print(f"\n=== Benchmark: {rows} rows per table ===")
+        dump_path = ensure_synthetic_dump(dump_dir, rows, seed)
+        stages = {}
+        print("\n--- Stage: dump load ---")
+        stages['dump_load'], sqlite_db_path = benchmark_dump_load(dump_path, repeat)
+        try:
+            print("\n--- Stage: conversion (null sink) ---")
+            stages['convert'] = benchmark_conversion(sqlite_db_path, repeat)
+            print(f"\n--- Micro-benchmarks: row conversion and datetime normalization ({micro_rows} rows per table) ---")
+            stages.update(benchmark_row_conversion(sqlite_db_path, repeat, micro_rows))
+            stages.update(benchmark_datetime_normalization(sqlite_db_path, repeat, micro_rows))
+            if with_mysql:
+                print("\n--- Stage: full load into MySQL ---")
+                stages['mysql_load'] = benchmark_mysql_load(sqlite_db_path, repeat)
+        finally:
+            os.remove(sqlite_db_path)
+        results['datasets'][str(rows)] = {'rows_per_table': rows, 'stages': stages}
+        for stage_name, stage in stages.items():
+            speedup = f"  {stage['speedup']:.1f}x faster" if 'speedup' in stage else ""
+            if stage.get('outputs_match') is False:
+                speedup += "  OUTPUT DIFFERS FROM THE REFERENCE"
+            print(f"  {stage_name:<24} {stage['seconds']:>9.3f}s  {stage['rows_per_second'] or 0:>14,.0f} rows/s{speedup}")
+    return results
+
+
+def compare_results(results, baseline, tolerance):
+    """Prints the throughput of every stage against the baseline; returns the regressed (size, stage) pairs."""
+    regressions = []
+    print(f"\n--- Comparison with baseline from {baseline.get('created_at')} (commit {baseline['environment'].get('git_commit')}) ---")
+    for size_key, dataset in results['datasets'].items():
+        baseline_dataset = baseline['datasets'].get(size_key)
+        if baseline_dataset is None:
+            print(f"  {size_key} rows: not in the baseline.")
+            continue
+        for stage_name, stage in dataset['stages'].items():
+            baseline_stage = baseline_dataset['stages'].get(stage_name)
+            if not baseline_stage or not baseline_stage.get('rows_per_second') or not stage.get('rows_per_second'):
+                continue
+            change = stage['rows_per_second'] / baseline_stage['rows_per_second'] - 1
+            verdict = ""
+            if change < -tolerance:
+                verdict = "  REGRESSION"
+                regressions.append((size_key, stage_name))
+            elif change > tolerance:
+                verdict = "  faster"
+            print(f"  {size_key:>9} rows  {stage_name:<24} {stage['rows_per_second']:>14,.0f} rows/s  "
+                  f"(baseline {baseline_stage['rows_per_second']:,.0f}, {change:+.1%}){verdict}")
+    if results['settings'] != baseline.get('settings'):
+        print("  Note: the benchmark settings differ from the baseline's; the numbers may not be comparable.")
+    return regressions
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark the Cloudreve SQLite-to-MySQL migration on synthetic Cloudreve v4 data.")
+    arg_parser.add_argument('--sizes', default=BENCHMARK_SIZES,
+                            help=f"rows per table, comma-separated with k/M suffixes, e.g. 10k,1M,10M (default {BENCHMARK_SIZES})")
+    arg_parser.add_argument('--seed', type=int, default=BENCHMARK_SEED, help="seed of the synthetic data generator")
+    arg_parser.add_argument('--repeat', type=int, default=BENCHMARK_REPEAT, help="runs per stage; the fastest one is reported")
+    arg_parser.add_argument('--dump-dir', default=BENCHMARK_DUMP_DIR, help="where generated dumps are kept for reuse")
+    arg_parser.add_argument('--mysql', action='store_true',
+                            help="also time a full migration into the MySQL database configured in main.py "
+                                 "(its benchmark tables are dropped and recreated)")
+    arg_parser.add_argument('--micro-rows', type=int, default=BENCHMARK_MICRO_ROWS,
+                            help="rows per table sampled by the row-conversion and datetime micro-benchmarks")
+    arg_parser.add_argument('--output', default=BENCHMARK_RESULTS_FILE, help="JSON results file to write")
+    arg_parser.add_argument('--compare', metavar='BASELINE',
+                            help="compare with an earlier results file and exit with 1 if a stage regressed")
+    arg_parser.add_argument('--tolerance', type=float, default=BENCHMARK_REGRESSION_TOLERANCE,
+                            help="slowdown (as a fraction) allowed before --compare reports a regression")
+    cli_args = arg_parser.parse_args()
+
+    benchmark_results = run_benchmarks([parse_benchmark_size(size) for size in cli_args.sizes.split(',')],
+                                       cli_args.seed, max(1, cli_args.repeat), cli_args.dump_dir, cli_args.mysql,
+                                       cli_args.micro_rows)
+    with open(cli_args.output, 'w', encoding='utf-8') as results_file:
+        json.dump(benchmark_results, results_file, indent=2)
+    print(f"\nBenchmark results written to '{cli_args.output}'.")
+    if cli_args.compare:
+        with open(cli_args.compare, encoding='utf-8') as baseline_file:
+            regressed_stages = compare_results(benchmark_results, json.load(baseline_file), cli_args.tolerance)
+        sys.exit(1 if regressed_stages else 0)
@@ -1,14 +1,28 @@
+import concurrent.futures
+import cProfile
+import datetime
+import decimal
+import functools
+import gzip
+import json
 import sqlite3
 import mysql.connector
 from mysql.connector import errorcode
 import os
+import queue
 import re
+import sys
 import tempfile
+import threading
+import time
 import traceback
+import argparse
+import urllib.parse
+import zlib
 
 # --- MySQL Connection Details (using your latest provided) ---
 MYSQL_HOST = ""
-MYSQL_PORT = 
+MYSQL_PORT = 3306
 MYSQL_USER = ""
 MYSQL_PASSWORD = ""
 MYSQL_DBNAME = ""
@@ -16,8 +30,81 @@ MYSQL_CHARSET = "utf8mb4"
 MYSQL_COLLATION = "utf8mb4_unicode_ci"
 # --- End MySQL Connection Details ---
 
+# --- Batched INSERT Settings ---
+INSERT_BATCH_ROWS = 1000           # Max rows per multi-row INSERT statement
+INSERT_BATCH_MAX_BYTES = None      # Max estimated bytes per statement; None = half of @@max_allowed_packet
+COMMIT_INTERVAL_ROWS = 50000       # Commit every N rows instead of once per table
+# --- End Batched INSERT Settings ---
+
+# --- LOAD DATA Bulk-Load Settings ---
+# Tables loaded with LOAD DATA LOCAL INFILE instead of INSERT; use {'*'} for all tables.
+# The server must allow it (local_infile=ON); otherwise the tool falls back to INSERT.
+# Experimental: the warning/row-count check has only been exercised with the connector's cursor
+# classes, not yet against a live MySQL/MariaDB server; run with --verify when enabling it.
+LOAD_DATA_TABLES = set()
+LOAD_DATA_FILE_MAX_ROWS = 50000    # Rows written to one temporary TSV file per LOAD DATA statement
+LOAD_DATA_TEMP_DIR = None          # Directory for the TSV files; None = system temp dir
+# --- End LOAD DATA Bulk-Load Settings ---
+
+# --- Bulk-Load Session Settings ---
+BULK_LOAD_DISABLE_BINLOG = False   # SET sql_log_bin=0 while loading (needs SUPER/SYSTEM_VARIABLES_ADMIN)
+INDEX_TEXT_PREFIX_LENGTH = 191     # Prefix length for indexed TEXT/BLOB columns (191 * 4 bytes fits 767)
+# --- End Bulk-Load Session Settings ---
+
+# --- Parallel Transfer Settings ---
+MIGRATION_WORKERS = 1              # >1 transfers table data in this many worker processes
+PARALLEL_CHUNK_ROWS = 200000       # Tables with an integer key are split into key ranges of this many rows
+PIPELINE_ENABLED = False           # Overlap SQLite reads, row conversion and MySQL writes in threads
+PIPELINE_QUEUE_DEPTH = 8           # Row blocks buffered between pipeline stages (bounds memory)
+PIPELINE_CONVERT_THREADS = 2       # Conversion threads between the reader and the writer
+# --- End Parallel Transfer Settings ---
+
+# --- Checkpoint Journal ---
+CHECKPOINT_JOURNAL_FILE = 'migration_checkpoint.sqlite'   # Progress journal used by --resume
+# --- End Checkpoint Journal ---
+
+# --- Metrics and Progress Settings ---
+METRICS_REPORT_FILE = 'migration_report.json'   # JSON timing report written at the end; None disables
+PROGRESS_INTERVAL_SECONDS = 15     # Seconds between progress lines while a table is transferring
+PROFILE_OUTPUT_DIR = None          # Directory for cProfile stats of each transfer loop (also --profile DIR)
+# --- End Metrics and Progress Settings ---
+
+# --- Incremental Sync Settings ---
+SYNC_UPDATED_AT_COLUMN = 'updated_at'   # --sync re-copies rows whose value here is >= the stored high-water mark
+                                        # (compared in UTC; values without an offset count as UTC)
+SYNC_DELETE_CHUNK_ROWS = 50000          # Key range size for the primary-key diff that finds deleted rows
+SYNC_KEY_BATCH_SIZE = 1000              # Keys per DELETE ... IN (...) and per missing-row fetch
+# --- End Incremental Sync Settings ---
+
+# --- Verification Settings ---
+VERIFY_AFTER_MIGRATION = False     # Compare row counts and chunk checksums at the end of every migration
+VERIFY_WORKERS = 4                 # Processes checksumming key ranges in parallel; 1 = in the main process
+VERIFY_CHUNK_ROWS = 100000         # Rows per checksummed key range
+VERIFY_ROW_DIFF_ROWS = 2000        # Differing ranges are split down to this size, then compared row by row
+VERIFY_REPORT_MAX_KEYS = 20        # Differing keys printed (and written to the report) per table
+# --- End Verification Settings ---
+
+# --- Offline Export Settings ---
+EXPORT_FORMAT = 'sql'                   # --export data files: 'sql' (extended INSERTs) or 'tsv' (for LOAD DATA)
+EXPORT_COMPRESS = True                  # gzip every data file
+EXPORT_GZIP_LEVEL = 6
+EXPORT_FILE_MAX_BYTES = 256 * 1024 * 1024   # Uncompressed bytes per data file before starting the next one
+EXPORT_INSERT_MAX_BYTES = 1024 * 1024   # Bytes per extended INSERT statement; keep below max_allowed_packet
+# --- End Offline Export Settings ---
+
+# --- Conversion Settings ---
+DATETIME_CACHE_SIZE = 65536        # LRU entries for normalized datetime strings
+# --- End Conversion Settings ---
+
 # --- SQLite Input File ---
 SQLITE_DUMP_FILE = 'export.sql'
+# Set to a Cloudreve .db file to read it directly (read-only) instead of loading SQLITE_DUMP_FILE.
+SQLITE_SOURCE_DB = None
+SQLITE_SOURCE_MMAP_SIZE = 0                     # PRAGMA mmap_size for the source DB in bytes; 0 disables
+SQLITE_SOURCE_LIVE = False                      # Source DB is still used by a running Cloudreve: read it with locking
+DUMP_LOAD_STATEMENTS_PER_TRANSACTION = 20000   # Statements executed per temp-DB transaction
+DUMP_LOAD_CACHE_SIZE_KIB = 256 * 1024           # PRAGMA cache_size for the temp DB while loading
+DUMP_LOAD_PROGRESS_INTERVAL_BYTES = 64 * 1024 * 1024
 # --- End SQLite Input File ---
 
 BOOLEAN_COLUMNS_MAP = {
@@ -132,12 +219,23 @@ def get_mysql_default_value(sqlite_default, mysql_type, column_name, table_name,
     return None
 
 
-def preprocess_mysql_datetime_string(value_str):
-    if not isinstance(value_str, str) or not value_str.strip():
+# Go's time.Time formats as Cloudreve writes them, e.g. "2024-05-01 12:00:00.123456789 +0800 CST m=+0.01",
+# "2024-05-01T12:00:00.5+08:00", "2024-05-01T12:00:00Z" or "2024-05-01 12:00:00".
+_DATETIME_FAST_RE = re.compile(
+    r"(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})(?:\.(\d+))?"
+    r"(?:Z|\s?[+\-]\d{2}:?\d{2}(?:\s+[A-Z_a-z]+)?)?(?:\s+m=[+\-]\d+\.\d+)?")
+_DATETIME_MONOTONIC_SUFFIX_RE = re.compile(r"\s+m=[\+\-]\d+\.\d+$")
+_DATETIME_OFFSET_RE = re.compile(r"^(.*?)(?:\s?([+\-]\d{2}:?\d{2}(?::?\d{2}(?:\.\d+)?)?|Z))(?:\s+[A-Z_a-z]+)?$")
+_DATE_ONLY_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_DATETIME_NO_FRACTION_RE = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+
+
+def _preprocess_mysql_datetime_string_slow(value_str):
+    if not value_str.strip():
         return None
 
-    cleaned_value = re.sub(r"\s+m=[\+\-]\d+\.\d+$", "", value_str).strip()
-    match_dt_offset = re.match(r"^(.*?)(?:\s?([+\-]\d{2}:?\d{2}(?::?\d{2}(?:\.\d+)?)?|Z))(?:\s+[A-Z_a-z]+)?$", cleaned_value)
+    cleaned_value = _DATETIME_MONOTONIC_SUFFIX_RE.sub("", value_str).strip()
+    match_dt_offset = _DATETIME_OFFSET_RE.match(cleaned_value)
 
     datetime_part_to_format = cleaned_value
     if match_dt_offset:
@@ -153,39 +251,2309 @@ def preprocess_mysql_datetime_string(value_str):
         frac_final = frac_digits_only[:6].ljust(6, '0') if frac_digits_only else "000000"
         datetime_part_to_format = f"{base}.{frac_final}"
     else:
-        if re.fullmatch(r"\d{4}-\d{2}-\d{2}", datetime_part_to_format):
+        if _DATE_ONLY_RE.fullmatch(datetime_part_to_format):
             datetime_part_to_format = f"{datetime_part_to_format} 00:00:00.000000"
-        elif re.fullmatch(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}", datetime_part_to_format): # No frac part
+        elif _DATETIME_NO_FRACTION_RE.fullmatch(datetime_part_to_format): # No frac part
              datetime_part_to_format = f"{datetime_part_to_format}.000000"
         # else: could be an invalid format, let MySQL handle it or add more parsing
 
     return datetime_part_to_format
 
 
+@functools.lru_cache(maxsize=DATETIME_CACHE_SIZE)
+def _preprocess_mysql_datetime_string_cached(value_str):
+    match_fast = _DATETIME_FAST_RE.fullmatch(value_str)
+    if match_fast:
+        date_part, time_part, frac = match_fast.groups()
+        frac_final = frac[:6].ljust(6, '0') if frac else "000000"
+        return f"{date_part} {time_part}.{frac_final}"
+    return _preprocess_mysql_datetime_string_slow(value_str)
+
+
+def preprocess_mysql_datetime_string(value_str):
+    """Normalizes a Go/ISO datetime string to MySQL's 'YYYY-MM-DD HH:MM:SS.ffffff' (offset dropped).
+
+    Common Cloudreve formats take a single precompiled-regex fast path; anything else goes
+    through the general parser. Results are memoized in a bounded LRU cache.
+    """
+    if not isinstance(value_str, str):
+        return None
+    return _preprocess_mysql_datetime_string_cached(value_str)
+
+
+def preprocess_mysql_datetime_strings(values):
+    """Batch form of preprocess_mysql_datetime_string for one column of a row block."""
+    normalize = _preprocess_mysql_datetime_string_cached
+    return [normalize(value_str) if isinstance(value_str, str) else None for value_str in values]
+
+
+# --- Row Conversion Plan ---
+# The converter plan is built once per table from the PRAGMA table_info output, so the
+# per-row loop only applies one specialized function per column that actually needs it.
+def _convert_boolean_value(value):
+    if value == 1 or (isinstance(value, str) and value.lower() in ['true', 't', '1']):
+        return 1
+    if value == 0 or (isinstance(value, str) and value.lower() in ['false', 'f', '0']):
+        return 0
+    return value
+
+
+def _make_json_bytes_converter(table_name, col_name):
+    def convert(value):
+        if not isinstance(value, bytes):
+            return value
+        try:
+            try: return value.decode('utf-8')
+            except UnicodeDecodeError:
+                print(f"Warning: UTF-8 decode failed for JSON bytes in {table_name}.{col_name}. Trying with 'replace'. Value: {repr(value)}")
+                return value.decode('utf-8', 'replace')
+        except Exception as e_json_decode:
+            print(f"Error decoding bytes for JSON in {table_name}.{col_name}: {e_json_decode}. Value: {repr(value)}. Setting to NULL.")
+            return None
+    return convert
+
+
+def _make_text_bytes_converter(table_name, col_name):
+    def convert(value):
+        if not isinstance(value, bytes):
+            return value
+        try:
+            return value.decode('utf-8', 'replace')
+        except Exception as e_text_decode:
+            print(f"Error decoding bytes for TEXT/CHAR in {table_name}.{col_name}: {e_text_decode}. Value: {repr(value)}. Setting to NULL.")
+            return None
+    return convert
+
+
+def build_row_converter_plan(table_name, column_names, mysql_column_types):
+    """Returns a tuple of (column_index, converter, kind) entries; passthrough columns are left out.
+
+    kind is one of 'boolean', 'timestamp', 'json' or 'text' and keys the per-type conversion timers.
+    """
+    plan = []
+    for i, (col_name, mysql_type) in enumerate(zip(column_names, mysql_column_types)):
+        mysql_type_upper = mysql_type.upper()
+        if mysql_type == "TINYINT(1)":
+            plan.append((i, _convert_boolean_value, 'boolean'))
+        elif mysql_type_upper.startswith("TIMESTAMP") or mysql_type_upper.startswith("DATETIME"):
+            plan.append((i, preprocess_mysql_datetime_string, 'timestamp'))
+        elif mysql_type == "JSON":
+            plan.append((i, _make_json_bytes_converter(table_name, col_name), 'json'))
+        elif "TEXT" in mysql_type_upper or "CHAR" in mysql_type_upper:
+            plan.append((i, _make_text_bytes_converter(table_name, col_name), 'text'))
+    return tuple(plan)
+
+
+def convert_rows(row_converter_plan, sqlite_rows, convert_seconds=None):
+    """Converts a block of rows; TIMESTAMP columns are normalized column-wise with the batch API.
+
+    With a convert_seconds dict, the time spent on each column is added to it by conversion kind.
+    """
+    if not row_converter_plan:
+        return [tuple(sqlite_row_tuple) for sqlite_row_tuple in sqlite_rows]
+    mysql_rows = [list(sqlite_row_tuple) for sqlite_row_tuple in sqlite_rows]
+    for i, converter, kind in row_converter_plan:
+        column_started_at = time.perf_counter()
+        if kind == 'timestamp':
+            normalized_column = preprocess_mysql_datetime_strings([mysql_row_values[i] for mysql_row_values in mysql_rows])
+            for mysql_row_values, normalized in zip(mysql_rows, normalized_column):
+                mysql_row_values[i] = normalized
+        else:
+            for mysql_row_values in mysql_rows:
+                mysql_row_values[i] = converter(mysql_row_values[i])
+        if convert_seconds is not None:
+            convert_seconds[kind] = convert_seconds.get(kind, 0.0) + time.perf_counter() - column_started_at
+    return [tuple(mysql_row_values) for mysql_row_values in mysql_rows]
+
+
+def convert_row(row_converter_plan, sqlite_row_tuple):
+    if not row_converter_plan:
+        return tuple(sqlite_row_tuple)
+    mysql_row_values = list(sqlite_row_tuple)
+    for i, converter, _ in row_converter_plan:
+        mysql_row_values[i] = converter(mysql_row_values[i])
+    return tuple(mysql_row_values)
+
+
+# --- Batched INSERT Writer ---
+def get_insert_batch_byte_limit(mysql_cursor):
+    """Byte budget for one multi-row INSERT, kept well under the server's max_allowed_packet."""
+    byte_limit = INSERT_BATCH_MAX_BYTES
+    try:
+        mysql_cursor.execute("SELECT @@max_allowed_packet;")
+        max_allowed_packet = int(mysql_cursor.fetchone()[0])
+        # Escaping can expand binary values, so leave half of the packet as headroom.
+        packet_limit = max_allowed_packet // 2
+        byte_limit = packet_limit if byte_limit is None else min(byte_limit, packet_limit)
+    except mysql.connector.Error as e_packet:
+        print(f"Warning: Could not read @@max_allowed_packet: {e_packet}")
+    return byte_limit if byte_limit is not None else 4 * 1024 * 1024
+
+
+def estimate_row_bytes(mysql_row_values):
+    """Bytes a row adds to the statement on the wire: UTF-8 length of text, twice the length of binary data."""
+    row_bytes = 0
+    for value in mysql_row_values:
+        if isinstance(value, str):
+            row_bytes += (len(value) if value.isascii() else len(value.encode('utf-8', 'surrogatepass'))) + 4
+        elif isinstance(value, (bytes, bytearray)):
+            row_bytes += 2 * len(value) + 4  # Every byte may need an escape character
+        else:
+            row_bytes += 24
+    return row_bytes
+
+
+# Errors after which the connection (or the statement size) is the problem, not a row of the batch.
+_INSERT_CONNECTION_ERRNOS = {
+    errorcode.ER_NET_PACKET_TOO_LARGE,
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+}
+# Errors after which InnoDB has rolled back the whole transaction (1205 only with
+# innodb_rollback_on_timeout, but the server setting is not checked), so every batch since
+# the last commit is gone and later statements must not be committed as if they were complete.
+_TRANSACTION_ROLLBACK_ERRNOS = {
+    errorcode.ER_LOCK_DEADLOCK,
+    errorcode.ER_LOCK_WAIT_TIMEOUT,
+    errorcode.ER_LOCK_TABLE_FULL,
+}
+
+
+def is_batch_aborting_error(mysql_conn, error):
+    """True for errors no split of the batch can recover from; they are re-raised instead of bisected."""
+    return error.errno in _INSERT_CONNECTION_ERRNOS or error.errno in _TRANSACTION_ROLLBACK_ERRNOS \
+        or not mysql_conn.is_connected()
+
+
+def _execute_multi_row_insert(mysql_cursor, insert_sql_prefix, column_count, batch, insert_sql_suffix=""):
+    row_placeholders = "(" + ", ".join(["%s"] * column_count) + ")"
+    insert_sql = insert_sql_prefix + ", ".join([row_placeholders] * len(batch)) + insert_sql_suffix + ";"
+    params = [value for _, mysql_row_values in batch for value in mysql_row_values]
+    mysql_cursor.execute(insert_sql, params)
+
+
+def _bisect_insert_batch(mysql_conn, mysql_cursor, insert_sql_prefix, column_count, batch, insert_sql_suffix=""):
+    """Inserts batch, splitting it on failure. Returns (row_pair, error) for the first bad row, or None.
+
+    Connection, packet-size and transaction-rollback errors are re-raised: no split can recover
+    from them, and halves succeeding after a rollback would hide the rows that were lost.
+    """
+    try:
+        _execute_multi_row_insert(mysql_cursor, insert_sql_prefix, column_count, batch, insert_sql_suffix)
+        return None
+    except mysql.connector.Error as e_insert:
+        if is_batch_aborting_error(mysql_conn, e_insert):
+            raise
+        if len(batch) == 1:
+            return batch[0], e_insert
+    mid = len(batch) // 2
+    return _bisect_insert_batch(mysql_conn, mysql_cursor, insert_sql_prefix, column_count, batch[:mid], insert_sql_suffix) or \
+        _bisect_insert_batch(mysql_conn, mysql_cursor, insert_sql_prefix, column_count, batch[mid:], insert_sql_suffix)
+
+
+def insert_row_batch(mysql_conn, mysql_cursor, insert_sql_prefix, insert_sql_template,
+                     mysql_safe_table_name, column_names, batch, insert_sql_suffix=""):
+    """Inserts a list of (sqlite_row, mysql_row_values) pairs with one multi-row INSERT.
+
+    insert_sql_suffix is appended after the VALUES list (e.g. an ON DUPLICATE KEY UPDATE clause).
+    A failed statement is rolled back by InnoDB as a whole, so the batch is bisected to
+    find the offending row, which is reported before rolling back and re-raising.
+    """
+    try:
+        _execute_multi_row_insert(mysql_cursor, insert_sql_prefix, len(column_names), batch, insert_sql_suffix)
+        return
+    except mysql.connector.Error as e_batch:
+        if is_batch_aborting_error(mysql_conn, e_batch):
+            print(f"\n!!! Batch insert of {len(batch)} rows into {mysql_safe_table_name} failed: {e_batch} !!!")
+            if e_batch.errno == errorcode.ER_NET_PACKET_TOO_LARGE:
+                print("    The statement exceeds max_allowed_packet; lower INSERT_BATCH_MAX_BYTES or INSERT_BATCH_ROWS.")
+            elif e_batch.errno in _TRANSACTION_ROLLBACK_ERRNOS:
+                print("    The transaction was rolled back, including rows since the last commit. Run again with --resume.")
+            raise
+        print(f"\n  Batch insert of {len(batch)} rows into {mysql_safe_table_name} failed ({e_batch}). Bisecting to find the bad row...")
+
+    failed = _bisect_insert_batch(mysql_conn, mysql_cursor, insert_sql_prefix, len(column_names), batch, insert_sql_suffix)
+    if failed is None:
+        print("  All rows of the batch were inserted after splitting it; continuing.")
+        return
+
+    (sqlite_row_tuple, mysql_row_values), e_insert = failed
+    print(f"\n!!! ERROR inserting row into table {mysql_safe_table_name} !!!")
+    print(f"    SQL Template: {insert_sql_template}")
+    print(f"    Problematic MySQL-bound values (len {len(mysql_row_values)}): {list(mysql_row_values)}")
+    print(f"    Original SQLite row values (len {len(sqlite_row_tuple)}): {sqlite_row_tuple}")
+    print(f"    Column names for insert (len {len(column_names)}): {column_names}")
+    print(f"    Insert error details: {e_insert} (Code: {e_insert.errno})")
+    if e_insert.errno == errorcode.ER_TRUNCATED_WRONG_VALUE_FOR_FIELD:
+        print("    This might be a data type mismatch or encoding issue for a specific field.")
+    mysql_conn.rollback()
+    raise e_insert
+
+
+# --- LOAD DATA LOCAL INFILE Engine ---
+# Errors meaning LOCAL INFILE is disabled on the client or server, not that the data is bad.
+_LOAD_DATA_LOCAL_REJECTED_ERRNOS = {
+    errorcode.ER_NOT_ALLOWED_COMMAND,
+    errorcode.ER_CLIENT_LOCAL_FILES_DISABLED,
+    errorcode.CR_LOAD_DATA_LOCAL_INFILE_REJECTED,
+}
+
+
+def table_uses_load_data(table_name):
+    return '*' in LOAD_DATA_TABLES or table_name in LOAD_DATA_TABLES
+
+
+def encode_load_data_field(value):
+    """Encodes one value for a LOAD DATA file using the default FIELDS ESCAPED BY '\\'."""
+    if value is None:
+        return b"\\N"
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    elif isinstance(value, float):
+        return repr(value).encode('ascii')
+    elif not isinstance(value, (bytes, bytearray)):
+        return str(value).encode('utf-8')
+    return bytes(value).replace(b"\\", b"\\\\").replace(b"\t", b"\\t").replace(b"\n", b"\\n") \
+        .replace(b"\r", b"\\r").replace(b"\0", b"\\0")
+
+
+def write_load_data_file(file_obj, batch):
+    for _, mysql_row_values in batch:
+        file_obj.write(b"\t".join([encode_load_data_field(value) for value in mysql_row_values]) + b"\n")
+
+
+def build_load_data_sql(table_spec, file_name_sql):
+    """LOAD DATA statement matching write_load_data_file; file_name_sql is a placeholder or a quoted path."""
+    load_cols_str_mysql = ", ".join([f"`{c}`" for c in table_spec['column_names']])
+    return (f"LOAD DATA LOCAL INFILE {file_name_sql} INTO TABLE `{table_spec['table_name']}` CHARACTER SET {MYSQL_CHARSET} "
+            f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({load_cols_str_mysql});")
+
+
+def load_row_block(mysql_conn, mysql_cursor, table_spec, batch, insert_fallback):
+    """Loads (sqlite_row, mysql_row_values) pairs with LOAD DATA LOCAL INFILE from a temporary TSV file.
+
+    If LOCAL INFILE is refused, the block goes through insert_fallback and False is returned
+    so the caller switches the table to INSERT. LOAD DATA LOCAL behaves as if IGNORE were
+    given: bad values are truncated or zeroed and duplicate keys skipped with only a warning.
+    So the block is loaded after a savepoint, and if the load fails, raises warnings or does
+    not load exactly one row per line, it is rolled back to the savepoint and retried through
+    insert_fallback, where strict mode raises and the bisection reports the exact bad row.
+    """
+    mysql_safe_table_name = f"`{table_spec['table_name']}`"
+    load_sql = build_load_data_sql(table_spec, "%s")
+
+    tsv_fd, tsv_path = tempfile.mkstemp(suffix=".tsv", prefix=f"{table_spec['table_name']}_", dir=LOAD_DATA_TEMP_DIR)
+    try:
+        with os.fdopen(tsv_fd, 'wb') as f_tsv:
+            write_load_data_file(f_tsv, batch)
+        mysql_cursor.execute("SAVEPOINT load_data_block;")
+        try:
+            mysql_cursor.execute(load_sql, (tsv_path,))
+        except mysql.connector.Error as e_load:
+            if is_batch_aborting_error(mysql_conn, e_load):
+                raise
+            mysql_cursor.execute("ROLLBACK TO SAVEPOINT load_data_block;")
+            if e_load.errno in _LOAD_DATA_LOCAL_REJECTED_ERRNOS:
+                print(f"    Warning: LOAD DATA LOCAL INFILE refused for {mysql_safe_table_name} ({e_load}). Falling back to INSERT.")
+                insert_fallback(batch)
+                return False
+            print(f"    Warning: LOAD DATA failed for {mysql_safe_table_name} ({e_load}). Retrying the block with INSERT...")
+            insert_fallback(batch)
+            return True
+        rows_loaded = mysql_cursor.rowcount
+        load_warning_count = mysql_cursor.warning_count
+        if load_warning_count or rows_loaded != len(batch):
+            mysql_cursor.execute("SHOW WARNINGS LIMIT 3;")
+            load_warnings = mysql_cursor.fetchall()
+            mysql_cursor.execute("ROLLBACK TO SAVEPOINT load_data_block;")
+            warning_details = "; ".join(f"{level} {code}: {message}" for level, code, message in load_warnings)
+            print(f"    Warning: LOAD DATA into {mysql_safe_table_name} loaded {rows_loaded} of {len(batch)} rows with "
+                  f"{load_warning_count} warnings{f' ({warning_details})' if warning_details else ''}. Retrying the block with INSERT...")
+            insert_fallback(batch)
+            return True
+        mysql_cursor.execute("RELEASE SAVEPOINT load_data_block;")
+        return True
+    finally:
+        try:
+            os.remove(tsv_path)
+        except OSError as e_remove:
+            print(f"    Warning: Could not remove LOAD DATA file '{tsv_path}': {e_remove}")
+
+
+# --- Deferred Index Creation ---
+def read_sqlite_indexes(sqlite_cursor, table_name):
+    """Reads the secondary indexes of a table via PRAGMA index_list/index_info.
+
+    Primary key indexes are skipped, since the PRIMARY KEY is created inline with the table.
+    """
+    sqlite_cursor.execute(f'PRAGMA index_list("{table_name}");')
+    index_list = sqlite_cursor.fetchall()
+    indexes = []
+    for index_row in index_list:
+        index_name, is_unique, origin = index_row[1], index_row[2], index_row[3]
+        is_partial = len(index_row) > 4 and index_row[4] == 1
+        if origin == 'pk':
+            continue
+        sqlite_cursor.execute(f'PRAGMA index_info("{index_name}");')
+        index_columns = [info_row[2] for info_row in sorted(sqlite_cursor.fetchall(), key=lambda r: r[0])]
+        indexes.append({
+            'name': index_name,
+            'unique': is_unique == 1,
+            'partial': is_partial,
+            'origin': origin,
+            'columns': index_columns,
+        })
+    return indexes
+
+
+def build_mysql_index_clauses(table_spec):
+    """Translates the SQLite indexes of a table spec into ALTER TABLE ADD INDEX clauses."""
+    table_name = table_spec['table_name']
+    mysql_type_by_column = dict(zip(table_spec['column_names'], table_spec['mysql_column_types']))
+    index_clauses = []
+    for index in table_spec['indexes']:
+        if not index['columns'] or None in index['columns']:
+            print(f"    Warning: Skipping expression index '{index['name']}' on {table_name}; MySQL needs functional key parts for it.")
+            continue
+        if any(mysql_type_by_column.get(col_name) == "JSON" for col_name in index['columns']):
+            print(f"    Warning: Skipping index '{index['name']}' on {table_name}; JSON columns cannot be indexed directly.")
+            continue
+
+        key_parts = []
+        has_prefix_key = False
+        for col_name in index['columns']:
+            mysql_col_type = mysql_type_by_column.get(col_name, "").upper()
+            if "TEXT" in mysql_col_type or "BLOB" in mysql_col_type:
+                key_parts.append(f"`{col_name}`({INDEX_TEXT_PREFIX_LENGTH})")
+                has_prefix_key = True
+            else:
+                key_parts.append(f"`{col_name}`")
+
+        is_unique = index['unique']
+        if is_unique and (index['partial'] or has_prefix_key):
+            reason = "it is a partial index" if index['partial'] else "it uses a TEXT/BLOB prefix"
+            print(f"    Warning: Creating unique index '{index['name']}' on {table_name} as non-unique because {reason}.")
+            is_unique = False
+        elif index['partial']:
+            print(f"    Warning: Partial index '{index['name']}' on {table_name} is created as a full index.")
+
+        if index['origin'] == 'u':
+            mysql_index_name = f"uniq_{'_'.join(index['columns'])}"
+        else:
+            mysql_index_name = index['name']
+        mysql_index_name = mysql_index_name[:64]
+        index_kind = "UNIQUE INDEX" if is_unique else "INDEX"
+        index_clauses.append(f"ADD {index_kind} `{mysql_index_name}` ({', '.join(key_parts)})")
+    return index_clauses
+
+
+def create_mysql_indexes(mysql_cursor, table_spec):
+    """Adds all secondary indexes of a table in one ALTER TABLE, after its data is loaded.
+
+    Returns the number of indexes added, or None if the ALTER TABLE failed.
+    """
+    index_clauses = build_mysql_index_clauses(table_spec)
+    if not index_clauses:
+        return 0
+    mysql_safe_table_name = f"`{table_spec['table_name']}`"
+    print(f"  Creating {len(index_clauses)} indexes on {mysql_safe_table_name}...")
+    try:
+        mysql_cursor.execute(f"ALTER TABLE {mysql_safe_table_name}\n  " + ",\n  ".join(index_clauses) + ";")
+    except mysql.connector.Error as e_index:
+        print(f"    Error creating indexes on {mysql_safe_table_name}: {e_index}")
+        return None
+    return len(index_clauses)
+
+
+def apply_bulk_load_session_settings(mysql_cursor):
+    """Relaxes per-row checks on a loading connection; they only apply to this session."""
+    mysql_cursor.execute("SET SESSION unique_checks=0;")
+    mysql_cursor.execute("SET SESSION foreign_key_checks=0;")
+    if BULK_LOAD_DISABLE_BINLOG:
+        try:
+            mysql_cursor.execute("SET SESSION sql_log_bin=0;")
+        except mysql.connector.Error as e_binlog:
+            print(f"Warning: Could not disable binary logging for this session: {e_binlog}")
+
+
+# --- Migration Metrics ---
+# Per-table metrics are plain dicts so worker processes can return them; the run metrics merge
+# them per table and keep the phase timings for the summary and the JSON report.
+TRANSFER_TIMERS = ('read_seconds', 'execute_seconds', 'commit_seconds')
+
+
+def new_table_metrics(table_name):
+    return {
+        'table_name': table_name,
+        'engine': 'insert',
+        'ranges': 1,
+        'rows': 0,
+        'bytes': 0,
+        'read_seconds': 0.0,
+        'convert_seconds': {},
+        'execute_seconds': 0.0,
+        'commit_seconds': 0.0,
+        'started_at': time.time(),
+        'finished_at': None,
+    }
+
+
+def new_run_metrics():
+    return {'started_at': time.time(), 'phases': [], 'tables': {}}
+
+
+def record_phase(run_metrics, phase_name, elapsed):
+    if run_metrics is not None:
+        run_metrics['phases'].append((phase_name, elapsed))
+
+
+def add_convert_seconds(total_convert_seconds, convert_seconds):
+    for kind, elapsed in convert_seconds.items():
+        total_convert_seconds[kind] = total_convert_seconds.get(kind, 0.0) + elapsed
+
+
+def merge_table_metrics(run_metrics, table_metrics):
+    """Adds the metrics of one transfer task (a table or one key range of it) to the run."""
+    merged = run_metrics['tables'].get(table_metrics['table_name'])
+    if merged is None:
+        run_metrics['tables'][table_metrics['table_name']] = dict(table_metrics, convert_seconds=dict(table_metrics['convert_seconds']))
+        return
+    merged['ranges'] += table_metrics['ranges']
+    merged['rows'] += table_metrics['rows']
+    merged['bytes'] += table_metrics['bytes']
+    for timer in TRANSFER_TIMERS:
+        merged[timer] += table_metrics[timer]
+    add_convert_seconds(merged['convert_seconds'], table_metrics['convert_seconds'])
+    merged['started_at'] = min(merged['started_at'], table_metrics['started_at'])
+    merged['finished_at'] = max(merged['finished_at'], table_metrics['finished_at'])
+    if table_metrics['engine'] != merged['engine']:
+        merged['engine'] = 'mixed'
+
+
+def table_wall_seconds(table_metrics):
+    return table_metrics['finished_at'] - table_metrics['started_at']
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{seconds:02d}s"
+    if minutes:
+        return f"{minutes}m{seconds:02d}s"
+    return f"{seconds}s"
+
+
+def format_progress(label, rows_done, expected_rows, rows_this_run, bytes_this_run, elapsed):
+    """Progress line with throughput; percentage and ETA need an expected row count."""
+    rows_per_sec = rows_this_run / elapsed if elapsed > 0 else 0.0
+    mib_per_sec = bytes_this_run / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+    if not expected_rows:
+        return f"{label}: {rows_done:,} rows, {rows_per_sec:,.0f} rows/s, {mib_per_sec:.1f} MiB/s"
+    percent_done = min(100.0, rows_done * 100.0 / expected_rows)
+    eta = format_duration(max(0, expected_rows - rows_done) / rows_per_sec) if rows_per_sec > 0 else "unknown"
+    return (f"{label}: {rows_done:,}/{expected_rows:,} rows ({percent_done:.1f}%), "
+            f"{rows_per_sec:,.0f} rows/s, {mib_per_sec:.1f} MiB/s, ETA {eta}")
+
+
+def print_phase_timings(run_metrics):
+    if not run_metrics['phases']:
+        return
+    print("\n--- Phase timings ---")
+    for phase_name, elapsed in run_metrics['phases']:
+        print(f"  {phase_name:<24} {elapsed:>10.2f}s")
+
+
+def print_table_timing_summary(run_metrics):
+    """Per-table throughput plus where the time went; with workers or the pipeline the stage
+    timers overlap, so they add up to more than the wall time."""
+    if not run_metrics['tables']:
+        return
+    print("\n--- Table transfer summary ---")
+    for table_metrics in sorted(run_metrics['tables'].values(), key=table_wall_seconds, reverse=True):
+        elapsed = table_wall_seconds(table_metrics)
+        rows_per_sec = table_metrics['rows'] / elapsed if elapsed > 0 else 0.0
+        mib_per_sec = table_metrics['bytes'] / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+        print(f"  {table_metrics['table_name']:<32} {table_metrics['rows']:>12} rows {elapsed:>10.2f}s "
+              f"{rows_per_sec:>12,.0f} rows/s {mib_per_sec:>8.1f} MiB/s")
+        convert_parts = ", ".join(f"{kind} {elapsed_kind:.2f}s" for kind, elapsed_kind in sorted(table_metrics['convert_seconds'].items()))
+        print(f"    read {table_metrics['read_seconds']:.2f}s, "
+              f"convert {sum(table_metrics['convert_seconds'].values()):.2f}s{f' ({convert_parts})' if convert_parts else ''}, "
+              f"{table_metrics['engine']} {table_metrics['execute_seconds']:.2f}s, commit {table_metrics['commit_seconds']:.2f}s")
+
+
+def write_metrics_report(run_metrics, report_path):
+    """Writes phases, per-table metrics and totals as JSON for comparing runs."""
+    finished_at = time.time()
+    table_reports = []
+    totals = {'rows': 0, 'bytes': 0, 'convert_seconds': {}}
+    totals.update({timer: 0.0 for timer in TRANSFER_TIMERS})
+    for table_metrics in run_metrics['tables'].values():
+        elapsed = table_wall_seconds(table_metrics)
+        table_reports.append({
+            'table': table_metrics['table_name'],
+            'engine': table_metrics['engine'],
+            'ranges': table_metrics['ranges'],
+            'rows': table_metrics['rows'],
+            'bytes': table_metrics['bytes'],
+            'wall_seconds': round(elapsed, 6),
+            'rows_per_second': round(table_metrics['rows'] / elapsed, 1) if elapsed > 0 else None,
+            'bytes_per_second': round(table_metrics['bytes'] / elapsed, 1) if elapsed > 0 else None,
+            'read_seconds': round(table_metrics['read_seconds'], 6),
+            'convert_seconds': {kind: round(elapsed_kind, 6) for kind, elapsed_kind in table_metrics['convert_seconds'].items()},
+            'execute_seconds': round(table_metrics['execute_seconds'], 6),
+            'commit_seconds': round(table_metrics['commit_seconds'], 6),
+        })
+        totals['rows'] += table_metrics['rows']
+        totals['bytes'] += table_metrics['bytes']
+        for timer in TRANSFER_TIMERS:
+            totals[timer] += table_metrics[timer]
+        add_convert_seconds(totals['convert_seconds'], table_metrics['convert_seconds'])
+    for timer in TRANSFER_TIMERS:
+        totals[timer] = round(totals[timer], 6)
+    totals['convert_seconds'] = {kind: round(elapsed_kind, 6) for kind, elapsed_kind in totals['convert_seconds'].items()}
+    transfer_seconds = sum(elapsed for phase_name, elapsed in run_metrics['phases'] if phase_name == 'data transfer')
+    totals['rows_per_second'] = round(totals['rows'] / transfer_seconds, 1) if transfer_seconds > 0 else None
+    totals['bytes_per_second'] = round(totals['bytes'] / transfer_seconds, 1) if transfer_seconds > 0 else None
+    report = {
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(run_metrics['started_at'])),
+        'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(finished_at)),
+        'total_seconds': round(finished_at - run_metrics['started_at'], 6),
+        'settings': {
+            'migration_workers': MIGRATION_WORKERS,
+            'pipeline_enabled': PIPELINE_ENABLED,
+            'insert_batch_rows': INSERT_BATCH_ROWS,
+            'commit_interval_rows': COMMIT_INTERVAL_ROWS,
+            'load_data_tables': sorted(LOAD_DATA_TABLES),
+        },
+        'phases': [{'name': phase_name, 'seconds': round(elapsed, 6)} for phase_name, elapsed in run_metrics['phases']],
+        'tables': sorted(table_reports, key=lambda table_report: table_report['wall_seconds'], reverse=True),
+        'totals': totals,
+    }
+    if 'verification' in run_metrics:
+        report['verification'] = run_metrics['verification']
+    try:
+        with open(report_path, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=2)
+            report_file.write("\n")
+        print(f"Metrics report written to '{report_path}'.")
+    except OSError as e_report:
+        print(f"Warning: Could not write metrics report '{report_path}': {e_report}")
+
+
+# --- Checkpoint Journal ---
+# A small local SQLite file recording which tables were created, loaded and indexed, plus the
+# key ranges of every table and the last key committed in each, so --resume can continue.
+def open_checkpoint_journal(journal_path, reset=False):
+    if reset and os.path.exists(journal_path):
+        os.remove(journal_path)
+    journal_conn = sqlite3.connect(journal_path, timeout=60)
+    journal_conn.execute("""CREATE TABLE IF NOT EXISTS migration_tables (
+        table_name TEXT PRIMARY KEY,
+        status TEXT NOT NULL
+    )""")
+    journal_conn.execute("""CREATE TABLE IF NOT EXISTS migration_ranges (
+        table_name TEXT NOT NULL,
+        range_id TEXT NOT NULL,
+        range_lower INTEGER,
+        range_upper INTEGER,
+        status TEXT NOT NULL,
+        last_key INTEGER,
+        rows_done INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (table_name, range_id)
+    )""")
+    journal_conn.execute("""CREATE TABLE IF NOT EXISTS sync_marks (
+        table_name TEXT PRIMARY KEY,
+        updated_at_mark TEXT,
+        key_mark INTEGER,
+        synced_at REAL NOT NULL
+    )""")
+    journal_conn.commit()
+    return journal_conn
+
+
+def _journal_range_id(key_range):
+    lower_key, upper_key = key_range if key_range is not None else (None, None)
+    return f"{'' if lower_key is None else lower_key}:{'' if upper_key is None else upper_key}"
+
+
+def journal_get_table_status(journal_conn, table_name):
+    status_row = journal_conn.execute("SELECT status FROM migration_tables WHERE table_name = ?;", (table_name,)).fetchone()
+    return status_row[0] if status_row else None
+
+
+def journal_set_table_status(journal_conn, table_name, status):
+    journal_conn.execute("INSERT OR REPLACE INTO migration_tables (table_name, status) VALUES (?, ?);", (table_name, status))
+    journal_conn.commit()
+
+
+def journal_get_key_ranges(journal_conn, table_name):
+    range_rows = journal_conn.execute(
+        "SELECT range_lower, range_upper FROM migration_ranges WHERE table_name = ? "
+        "ORDER BY range_lower IS NOT NULL, range_lower;", (table_name,)).fetchall()
+    return [(lower_key, upper_key) for lower_key, upper_key in range_rows]
+
+
+def journal_save_key_ranges(journal_conn, table_name, key_ranges):
+    journal_conn.executemany(
+        "INSERT OR IGNORE INTO migration_ranges (table_name, range_id, range_lower, range_upper, status) "
+        "VALUES (?, ?, ?, ?, 'pending');",
+        [(table_name, _journal_range_id(key_range), key_range[0], key_range[1]) for key_range in key_ranges])
+    journal_conn.commit()
+
+
+def journal_get_range_progress(journal_conn, table_name, key_range):
+    """Returns (status, last_key, rows_done) for a key range, or None if it was never recorded."""
+    return journal_conn.execute(
+        "SELECT status, last_key, rows_done FROM migration_ranges WHERE table_name = ? AND range_id = ?;",
+        (table_name, _journal_range_id(key_range))).fetchone()
+
+
+def journal_record_range_progress(journal_conn, table_name, key_range, status, last_key, rows_done):
+    lower_key, upper_key = key_range if key_range is not None else (None, None)
+    journal_conn.execute(
+        "INSERT OR REPLACE INTO migration_ranges (table_name, range_id, range_lower, range_upper, status, last_key, rows_done) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?);",
+        (table_name, _journal_range_id(key_range), lower_key, upper_key, status, last_key, rows_done))
+    journal_conn.commit()
+
+
+def journal_get_sync_marks(journal_conn, table_name):
+    """Returns (updated_at_mark, key_mark) recorded for table_name, or None if it has none."""
+    row = journal_conn.execute("SELECT updated_at_mark, key_mark FROM sync_marks WHERE table_name = ?;",
+                               (table_name,)).fetchone()
+    return tuple(row) if row else None
+
+
+def journal_save_sync_marks(journal_conn, table_name, sync_marks):
+    journal_conn.execute("INSERT OR REPLACE INTO sync_marks (table_name, updated_at_mark, key_mark, synced_at) "
+                         "VALUES (?, ?, ?, ?);", (table_name, sync_marks[0], sync_marks[1], time.time()))
+    journal_conn.commit()
+
+
+def discard_uncommitted_range_rows(mysql_conn, table_spec, key_range, last_key):
+    """Deletes rows of a partially loaded range past its last journaled key.
+
+    A crash between the MySQL commit and the journal write would otherwise leave rows that the
+    resumed transfer inserts again.
+    """
+    mysql_safe_table_name = f"`{table_spec['table_name']}`"
+    key_column = table_spec['integer_key_column']
+    mysql_cursor = mysql_conn.cursor()
+    try:
+        if not key_column:
+            mysql_cursor.execute(f"DELETE FROM {mysql_safe_table_name};")
+        else:
+            lower_key = last_key if last_key is not None else (key_range[0] if key_range else None)
+            upper_key = key_range[1] if key_range else None
+            conditions, params = [], []
+            if lower_key is not None:
+                conditions.append(f"`{key_column}` > %s")
+                params.append(lower_key)
+            if upper_key is not None:
+                conditions.append(f"`{key_column}` <= %s")
+                params.append(upper_key)
+            where_sql = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            mysql_cursor.execute(f"DELETE FROM {mysql_safe_table_name}{where_sql};", params)
+        mysql_conn.commit()
+        return mysql_cursor.rowcount
+    finally:
+        mysql_cursor.close()
+
+
+# --- Read/Convert/Write Pipeline ---
+# With PIPELINE_ENABLED, a reader thread fetches row blocks from SQLite, PIPELINE_CONVERT_THREADS
+# threads convert them and the calling thread writes them to MySQL. The stages are joined by
+# bounded queues, so at most about 2 * PIPELINE_QUEUE_DEPTH blocks are held in memory. Python
+# conversion still holds the GIL, but SQLite steps and MySQL socket waits release it, so the
+# three stages overlap.
+_PIPELINE_END = object()
+
+
+def new_pipeline_metrics():
+    return {
+        'lock': threading.Lock(),
+        'stages': {stage: {'rows': 0, 'busy': 0.0} for stage in ('read', 'convert', 'write')},
+        'queues': {name: {'samples': 0, 'depth_total': 0, 'depth_max': 0} for name in ('read', 'convert')},
+        'started_at': time.perf_counter(),
+    }
+
+
+def _record_stage(pipeline_metrics, stage, rows, busy_seconds):
+    with pipeline_metrics['lock']:
+        stage_metrics = pipeline_metrics['stages'][stage]
+        stage_metrics['rows'] += rows
+        stage_metrics['busy'] += busy_seconds
+
+
+def _sample_queue_depth(pipeline_metrics, name, block_queue):
+    depth = block_queue.qsize()
+    queue_metrics = pipeline_metrics['queues'][name]
+    queue_metrics['samples'] += 1
+    queue_metrics['depth_total'] += depth
+    queue_metrics['depth_max'] = max(queue_metrics['depth_max'], depth)
+
+
+def format_pipeline_metrics(pipeline_metrics):
+    """One-line summary of per-stage throughput and queue depths, naming the busiest stage."""
+    stage_parts = []
+    stage_load = {}
+    for stage, stage_metrics in pipeline_metrics['stages'].items():
+        busy = stage_metrics['busy']
+        if stage == 'convert':
+            busy /= max(1, PIPELINE_CONVERT_THREADS)
+        stage_load[stage] = busy
+        rows_per_sec = stage_metrics['rows'] / busy if busy > 0 else 0.0
+        stage_parts.append(f"{stage} {rows_per_sec:,.0f} rows/s (busy {busy:.2f}s)")
+    queue_parts = []
+    for name, queue_metrics in pipeline_metrics['queues'].items():
+        avg_depth = queue_metrics['depth_total'] / queue_metrics['samples'] if queue_metrics['samples'] else 0.0
+        queue_parts.append(f"{name} queue avg {avg_depth:.1f}/max {queue_metrics['depth_max']} of {PIPELINE_QUEUE_DEPTH}")
+    bottleneck = max(stage_load, key=stage_load.get)
+    return f"Pipeline: {', '.join(stage_parts)}; {', '.join(queue_parts)}; bottleneck: {bottleneck}"
+
+
+def iter_converted_row_blocks(sqlite_cursor, table_spec, key_range, row_converter_plan, table_metrics, pipeline_metrics=None):
+    """Yields (sqlite_rows, mysql_rows) blocks in key order, pipelined when pipeline_metrics is given.
+
+    Read and conversion time is added to table_metrics.
+    """
+    if pipeline_metrics is None:
+        row_blocks = _iter_sqlite_row_blocks(sqlite_cursor, table_spec, key_range, INSERT_BATCH_ROWS)
+        while True:
+            read_started_at = time.perf_counter()
+            sqlite_rows = next(row_blocks, None)
+            table_metrics['read_seconds'] += time.perf_counter() - read_started_at
+            if sqlite_rows is None:
+                return
+            yield sqlite_rows, convert_rows(row_converter_plan, sqlite_rows, table_metrics['convert_seconds'])
+    yield from _iter_pipelined_row_blocks(sqlite_cursor, table_spec, key_range, row_converter_plan,
+                                          table_metrics, pipeline_metrics)
+
+
+def _iter_pipelined_row_blocks(sqlite_cursor, table_spec, key_range, row_converter_plan, table_metrics, pipeline_metrics):
+    read_queue = queue.Queue(maxsize=PIPELINE_QUEUE_DEPTH)
+    convert_queue = queue.Queue(maxsize=PIPELINE_QUEUE_DEPTH)
+    stop_event = threading.Event()
+
+    def put_unless_stopped(block_queue, item):
+        while not stop_event.is_set():
+            try:
+                block_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get_unless_stopped(block_queue):
+        while not stop_event.is_set():
+            try:
+                return block_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _PIPELINE_END
+
+    # Items are (sequence, sqlite_rows, mysql_rows, error); errors travel in order to the writer.
+    def read_blocks():
+        sequence = 0
+        try:
+            row_blocks = _iter_sqlite_row_blocks(sqlite_cursor, table_spec, key_range, INSERT_BATCH_ROWS)
+            while not stop_event.is_set():
+                read_started_at = time.perf_counter()
+                sqlite_rows = next(row_blocks, None)
+                read_seconds = time.perf_counter() - read_started_at
+                table_metrics['read_seconds'] += read_seconds  # Only the reader thread updates it
+                if sqlite_rows is None:
+                    break
+                _record_stage(pipeline_metrics, 'read', len(sqlite_rows), read_seconds)
+                if not put_unless_stopped(read_queue, (sequence, sqlite_rows, None, None)):
+                    return
+                sequence += 1
+        except BaseException as e_read:
+            put_unless_stopped(read_queue, (sequence, None, None, e_read))
+        finally:
+            for _ in range(PIPELINE_CONVERT_THREADS):
+                put_unless_stopped(read_queue, _PIPELINE_END)
+
+    def convert_blocks():
+        convert_seconds = {}
+        try:
+            while True:
+                item = get_unless_stopped(read_queue)
+                if item is _PIPELINE_END:
+                    put_unless_stopped(convert_queue, _PIPELINE_END)
+                    return
+                sequence, sqlite_rows, _, error = item
+                if error is None:
+                    convert_started_at = time.perf_counter()
+                    try:
+                        item = (sequence, sqlite_rows, convert_rows(row_converter_plan, sqlite_rows, convert_seconds), None)
+                        _record_stage(pipeline_metrics, 'convert', len(sqlite_rows), time.perf_counter() - convert_started_at)
+                    except BaseException as e_convert:
+                        item = (sequence, sqlite_rows, None, e_convert)
+                if not put_unless_stopped(convert_queue, item):
+                    return
+        finally:
+            with pipeline_metrics['lock']:
+                add_convert_seconds(table_metrics['convert_seconds'], convert_seconds)
+
+    threads = [threading.Thread(target=read_blocks, name="pipeline-reader", daemon=True)]
+    threads += [threading.Thread(target=convert_blocks, name=f"pipeline-convert-{i}", daemon=True)
+                for i in range(PIPELINE_CONVERT_THREADS)]
+    for thread in threads:
+        thread.start()
+
+    # Converters may finish blocks out of order; reorder them so keys stay ascending for checkpoints.
+    reorder_buffer = {}
+    next_sequence = 0
+    converters_finished = 0
+    try:
+        while converters_finished < PIPELINE_CONVERT_THREADS:
+            _sample_queue_depth(pipeline_metrics, 'read', read_queue)
+            _sample_queue_depth(pipeline_metrics, 'convert', convert_queue)
+            item = convert_queue.get()
+            if item is _PIPELINE_END:
+                converters_finished += 1
+                continue
+            reorder_buffer[item[0]] = item
+            while next_sequence in reorder_buffer:
+                _, sqlite_rows, mysql_rows, error = reorder_buffer.pop(next_sequence)
+                if error is not None:
+                    raise error
+                write_started_at = time.perf_counter()
+                yield sqlite_rows, mysql_rows
+                _record_stage(pipeline_metrics, 'write', len(sqlite_rows), time.perf_counter() - write_started_at)
+                next_sequence += 1
+    finally:
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+
+
+# --- Streaming SQLite Dump Loader ---
+# Transaction control in the dump is skipped; the loader commits in bounded transactions itself.
+_DUMP_TRANSACTION_CONTROL_RE = re.compile(r"^\s*(BEGIN|COMMIT|END|ROLLBACK)\b", re.IGNORECASE)
+
+
+def _split_sql_statements(sql_text):
+    """Splits text holding several complete statements (e.g. two INSERTs on one line)."""
+    statements = []
+    start = 0
+    pos = sql_text.find(';')
+    while pos != -1:
+        candidate = sql_text[start:pos + 1]
+        if sqlite3.complete_statement(candidate):
+            if candidate.strip():
+                statements.append(candidate)
+            start = pos + 1
+        pos = sql_text.find(';', pos + 1)
+    if sql_text[start:].strip():
+        statements.append(sql_text[start:])
+    return statements
+
+
+def _execute_dump_statement(sqlite_cursor, statement):
+    try:
+        sqlite_cursor.execute(statement)
+    except (sqlite3.Warning, sqlite3.ProgrammingError) as e_multi:
+        if "one statement at a time" not in str(e_multi):
+            raise
+        for single_statement in _split_sql_statements(statement):
+            if not is_dump_transaction_control(single_statement):
+                sqlite_cursor.execute(single_statement)
+
+
+def is_dump_transaction_control(statement):
+    """True for BEGIN/COMMIT/END, which the loader skips; a ROLLBACK aborts the load.
+
+    sqlite3 .dump ends with "ROLLBACK; -- due to errors" when it could not read the whole
+    database, so the data before it is incomplete and must not be migrated.
+    """
+    control_match = _DUMP_TRANSACTION_CONTROL_RE.match(statement)
+    if control_match is None:
+        return False
+    if control_match.group(1).upper() == 'ROLLBACK':
+        raise sqlite3.DatabaseError(f"The dump contains '{statement.strip()}'; it was written after errors and "
+                                    "is incomplete. Create a new dump (or use SQLITE_SOURCE_DB) and run again.")
+    return True
+
+
+def load_sqlite_dump(sqlite_conn, dump_path):
+    """Streams a SQLite text dump into sqlite_conn without reading the whole file into memory.
+
+    Lines are accumulated until sqlite3.complete_statement() reports a full statement, which
+    is executed inside transactions of DUMP_LOAD_STATEMENTS_PER_TRANSACTION statements.
+    """
+    sqlite_conn.isolation_level = None  # Transactions are managed explicitly below
+    sqlite_cursor = sqlite_conn.cursor()
+    sqlite_cursor.execute("PRAGMA journal_mode=OFF;")
+    sqlite_cursor.execute("PRAGMA synchronous=OFF;")
+    sqlite_cursor.execute(f"PRAGMA cache_size=-{int(DUMP_LOAD_CACHE_SIZE_KIB)};")
+    sqlite_cursor.execute("PRAGMA temp_store=MEMORY;")
+
+    total_bytes = os.path.getsize(dump_path)
+    bytes_read = 0
+    next_progress_at = DUMP_LOAD_PROGRESS_INTERVAL_BYTES
+    statements_executed = 0
+    statements_in_transaction = 0
+    statement_lines = []
+
+    try:
+        with open(dump_path, 'rb') as f_dump:
+            for raw_line in f_dump:
+                bytes_read += len(raw_line)
+                line = raw_line.decode('utf-8', 'replace')
+                statement_lines.append(line)
+                # complete_statement() rescans the whole buffer, so only ask once a line could end one.
+                if not line.rstrip().endswith(';'):
+                    continue
+                statement = "".join(statement_lines)
+                if not sqlite3.complete_statement(statement):
+                    continue
+                statement_lines = []
+
+                if _DUMP_TRANSACTION_CONTROL_RE.match(statement):
+                    # The same line may continue after the control statement, e.g. "BEGIN TRANSACTION;CREATE TABLE t(a);"
+                    statement = "".join(single_statement for single_statement in _split_sql_statements(statement)
+                                        if not is_dump_transaction_control(single_statement))
+                    if not statement.strip():
+                        continue
+                if statements_in_transaction == 0:
+                    sqlite_cursor.execute("BEGIN;")
+                _execute_dump_statement(sqlite_cursor, statement)
+                statements_executed += 1
+                statements_in_transaction += 1
+                if statements_in_transaction >= DUMP_LOAD_STATEMENTS_PER_TRANSACTION:
+                    sqlite_cursor.execute("COMMIT;")
+                    statements_in_transaction = 0
+
+                if bytes_read >= next_progress_at:
+                    percent = (bytes_read / total_bytes * 100) if total_bytes else 100.0
+                    print(f"  Loaded {statements_executed} statements, "
+                          f"{bytes_read / 1048576:.1f}/{total_bytes / 1048576:.1f} MiB ({percent:.1f}%)")
+                    next_progress_at = bytes_read + DUMP_LOAD_PROGRESS_INTERVAL_BYTES
+
+        trailing_sql = "".join(statement_lines)
+        if trailing_sql.strip() and not is_dump_transaction_control(trailing_sql):
+            print(f"Warning: Dump ends with an incomplete statement ({len(trailing_sql)} chars). Trying to execute it anyway.")
+            if statements_in_transaction == 0:
+                sqlite_cursor.execute("BEGIN;")
+                statements_in_transaction = 1
+            _execute_dump_statement(sqlite_cursor, trailing_sql)
+            statements_executed += 1
+
+        if statements_in_transaction:
+            sqlite_cursor.execute("COMMIT;")
+    except Exception:
+        if sqlite_conn.in_transaction:
+            sqlite_cursor.execute("ROLLBACK;")
+        raise
+    finally:
+        sqlite_cursor.close()
+        sqlite_conn.isolation_level = ""
+
+    print(f"  Loaded {statements_executed} statements ({bytes_read / 1048576:.1f} MiB) from '{dump_path}'.")
+    return statements_executed
+
+
 # --- Main Migration Logic ---
-def migrate_data():
+def use_direct_sqlite_source():
+    return bool(SQLITE_SOURCE_DB) and os.path.exists(SQLITE_SOURCE_DB)
+
+
+def open_sqlite_source_db(db_path, immutable=True):
+    """Opens an existing SQLite database read-only through a URI, optionally memory-mapped.
+
+    immutable=1 lets SQLite skip all locking and change detection, so it must only be used
+    while nothing else (e.g. a running Cloudreve) is writing to the file; SQLITE_SOURCE_LIVE
+    turns it off everywhere. An immutable connection also ignores the -wal file, so a database
+    whose WAL still holds committed transactions (Cloudreve was killed or is still running)
+    is refused instead of being migrated without them.
+    """
+    uri = f"file:{urllib.parse.quote(os.path.abspath(db_path))}?mode=ro"
+    if immutable and not SQLITE_SOURCE_LIVE:
+        wal_path = db_path + "-wal"
+        if os.path.exists(wal_path) and os.path.getsize(wal_path) > 0:
+            raise sqlite3.OperationalError(
+                f"'{wal_path}' is not empty, so '{db_path}' has transactions that are not checkpointed yet. "
+                f"Stop Cloudreve and run: sqlite3 \"{db_path}\" \"PRAGMA wal_checkpoint(TRUNCATE);\" "
+                f"(or set SQLITE_SOURCE_LIVE = True to read the database with its WAL).")
+        uri += "&immutable=1"
+    sqlite_conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    if SQLITE_SOURCE_MMAP_SIZE:
+        sqlite_conn.execute(f"PRAGMA mmap_size={int(SQLITE_SOURCE_MMAP_SIZE)};")
+    return sqlite_conn
+
+
+def connect_mysql(**connect_kwargs):
+    if LOAD_DATA_TABLES:
+        connect_kwargs.setdefault('allow_local_infile', True)
+    return mysql.connector.connect(
+        host=MYSQL_HOST, port=MYSQL_PORT, user=MYSQL_USER, password=MYSQL_PASSWORD,
+        database=MYSQL_DBNAME, charset=MYSQL_CHARSET, use_unicode=True, **connect_kwargs
+    )
+
+
+def build_create_table_sql(mysql_safe_table_name, column_definitions, pk_column_tuples):
+    create_table_sql = f'CREATE TABLE {mysql_safe_table_name} (\n  ' + ",\n  ".join(column_definitions)
+    if pk_column_tuples:
+        sorted_pk_col_names = [col_name_quoted for pk_order, col_name_quoted in sorted(pk_column_tuples, key=lambda x: x[0])]
+        create_table_sql += f",\n  PRIMARY KEY ({', '.join(sorted_pk_col_names)})"
+
+    create_table_sql += f"\n) ENGINE=InnoDB CHARACTER SET={MYSQL_CHARSET} COLLATE={MYSQL_COLLATION};"
+    return create_table_sql
+
+
+def _recreate_mysql_table(mysql_cursor, mysql_safe_table_name, create_table_sql):
+    print(f"  Dropping and Creating table {mysql_safe_table_name} in MySQL...")
+    try:
+        mysql_cursor.execute(f'SET FOREIGN_KEY_CHECKS=0;')
+        mysql_cursor.execute(f'DROP TABLE IF EXISTS {mysql_safe_table_name};')
+    except mysql.connector.Error as e_drop:
+        print(f"    Warning: Could not drop table {mysql_safe_table_name} (may not exist): {e_drop}")
+    finally:
+         mysql_cursor.execute(f'SET FOREIGN_KEY_CHECKS=1;')
+
+    mysql_cursor.execute(create_table_sql) # This is where the error occurred
+    print(f"  Table {mysql_safe_table_name} created.")
+
+
+def create_mysql_table(sqlite_cursor, mysql_cursor, table_name, recreate=True):
+    """Drops and recreates table_name in MySQL from its SQLite schema.
+
+    Returns a picklable table spec dict used by the transfer step, or None if the schema
+    could not be read. With recreate=False only the spec is built (used when resuming and verifying).
+    """
+    mysql_safe_table_name = f"`{table_name}`"
+    sqlite_cursor.execute(f'PRAGMA table_info("{table_name}");')
+    schema_info = sqlite_cursor.fetchall()
+    if not schema_info:
+        print(f"Could not get schema for {table_name}. Skipping.")
+        return None
+
+    column_definitions = []
+    pk_column_tuples = []
+    column_names_ordered_from_pragma = []
+    mysql_column_types = []
+    table_has_auto_increment_id = False
+
+    for col_pragma in schema_info:
+        col_name, col_type_sqlite, col_notnull_flag, col_dflt_val_sqlite, col_pk_order = col_pragma[1], col_pragma[2], col_pragma[3], col_pragma[4], col_pragma[5]
+        mysql_safe_col_name = f"`{col_name}`"
+        column_names_ordered_from_pragma.append(col_name)
+
+        is_part_of_pk = (col_pk_order > 0)
+        is_sqlite_col_not_null = (col_notnull_flag == 1)
+        mysql_col_type = get_mysql_column_type(col_type_sqlite, col_name, table_name, is_part_of_pk)
+        mysql_column_types.append(mysql_col_type)
+
+        col_def = f"{mysql_safe_col_name} {mysql_col_type}"
+        if "AUTO_INCREMENT" in mysql_col_type.upper():
+            table_has_auto_increment_id = True
+        else:
+            if is_sqlite_col_not_null: col_def += " NOT NULL"
+
+            # Pass is_sqlite_col_not_null to decide if DEFAULT NULL is appropriate
+            mysql_default = get_mysql_default_value(col_dflt_val_sqlite, mysql_col_type, col_name, table_name, is_sqlite_col_not_null)
+            if mysql_default is not None:
+                # Only add DEFAULT NULL if column is nullable and SQLite default was NULL
+                if mysql_default == "NULL" and not is_sqlite_col_not_null:
+                    col_def += " DEFAULT NULL"
+                elif mysql_default != "NULL": # For any other non-NULL default value
+                    col_def += f" DEFAULT {mysql_default}"
+                # If mysql_default is "NULL" but col is NOT NULL, DEFAULT clause is omitted.
+                # If mysql_default is None (e.g. for TEXT), DEFAULT clause is omitted.
+
+        column_definitions.append(col_def)
+        if is_part_of_pk :
+            pk_column_tuples.append((col_pk_order, mysql_safe_col_name))
+
+    create_table_sql = build_create_table_sql(mysql_safe_table_name, column_definitions, pk_column_tuples)
+    if recreate:
+        _recreate_mysql_table(mysql_cursor, mysql_safe_table_name, create_table_sql)
+
+    integer_key_column = None
+    if len(pk_column_tuples) == 1:
+        pk_index = next(i for i, col_pragma in enumerate(schema_info) if col_pragma[5] > 0)
+        if mysql_column_types[pk_index].upper().startswith("BIGINT"):
+            integer_key_column = column_names_ordered_from_pragma[pk_index]
+
+    return {
+        'table_name': table_name,
+        'column_names': column_names_ordered_from_pragma,
+        'mysql_column_types': mysql_column_types,
+        'has_auto_increment_id': table_has_auto_increment_id,
+        'integer_key_column': integer_key_column,
+        'primary_key_columns': [column_names_ordered_from_pragma[i] for i, col_pragma in
+                                sorted(enumerate(schema_info), key=lambda item: item[1][5]) if col_pragma[5] > 0],
+        'indexes': read_sqlite_indexes(sqlite_cursor, table_name),
+        'create_table_sql': create_table_sql,
+    }
+
+
+def plan_key_ranges(sqlite_cursor, table_spec, chunk_rows, key_range=None):
+    """Splits a table (or one key range of it) on its integer key into ranges of about chunk_rows rows each.
+
+    Returns (lower_exclusive, upper_inclusive) tuples where None means unbounded, or
+    [(None, None)] if the table has no integer key or fits in one chunk.
+    """
+    key_column = table_spec['integer_key_column']
+    if not key_column:
+        return [(None, None)]
+    boundary_sql = (f'SELECT "{key_column}" FROM "{table_spec["table_name"]}" '
+                    f'WHERE "{key_column}" > ? ORDER BY "{key_column}" LIMIT 1 OFFSET ?;')
+    key_ranges = []
+    lower_key, upper_key = key_range if key_range is not None else (None, None)
+    while True:
+        # OFFSET walks the key index only, so planning costs one index scan over the table.
+        if lower_key is None:
+            sqlite_cursor.execute(f'SELECT "{key_column}" FROM "{table_spec["table_name"]}" '
+                                  f'ORDER BY "{key_column}" LIMIT 1 OFFSET ?;', (chunk_rows - 1,))
+        else:
+            sqlite_cursor.execute(boundary_sql, (lower_key, chunk_rows - 1))
+        boundary_row = sqlite_cursor.fetchone()
+        if boundary_row is None or (upper_key is not None and boundary_row[0] >= upper_key):
+            key_ranges.append((lower_key, upper_key))
+            return key_ranges
+        key_ranges.append((lower_key, boundary_row[0]))
+        lower_key = boundary_row[0]
+
+
+def _iter_sqlite_row_blocks(sqlite_cursor, table_spec, key_range, block_rows):
+    """Yields lists of source rows.
+
+    Tables with an integer key are read in key order with keyset pagination, so the last key
+    committed is a valid resume point; other tables are read with a plain scan.
+    """
+    table_name = table_spec['table_name']
+    column_names = table_spec['column_names']
+    select_cols_str_sqlite = ", ".join([f'"{c}"' for c in column_names])
+    if not table_spec['integer_key_column']:
+        sqlite_cursor.execute(f'SELECT {select_cols_str_sqlite} FROM "{table_name}";')
+        while True:
+            sqlite_rows = sqlite_cursor.fetchmany(block_rows)
+            if not sqlite_rows:
+                return
+            yield sqlite_rows
+
+    key_column = table_spec['integer_key_column']
+    key_index = column_names.index(key_column)
+    last_key, upper_key = key_range if key_range is not None else (None, None)
+    while True:
+        conditions, params = [], []
+        if last_key is not None:
+            conditions.append(f'"{key_column}" > ?')
+            params.append(last_key)
+        if upper_key is not None:
+            conditions.append(f'"{key_column}" <= ?')
+            params.append(upper_key)
+        where_sql = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        sqlite_cursor.execute(f'SELECT {select_cols_str_sqlite} FROM "{table_name}"{where_sql} '
+                              f'ORDER BY "{key_column}" LIMIT ?;', params + [block_rows])
+        sqlite_rows = sqlite_cursor.fetchall()
+        if not sqlite_rows:
+            return
+        yield sqlite_rows
+        if len(sqlite_rows) < block_rows:
+            return
+        last_key = sqlite_rows[-1][key_index]
+
+
+def describe_key_range(table_spec, key_range):
+    if key_range is None or key_range == (None, None):
+        return ""
+    lower_key, upper_key = key_range
+    lower_str = "-inf" if lower_key is None else str(lower_key)
+    upper_str = "+inf" if upper_key is None else str(upper_key)
+    return f" ({table_spec['integer_key_column']} in ({lower_str}, {upper_str}])"
+
+
+def transfer_table_data(sqlite_conn, mysql_conn, table_spec, log_prefix="  ", key_range=None, checkpoint_journal=None,
+                        expected_rows=None):
+    """Copies the rows of one table (or of one key range of it) into the already created MySQL table.
+
+    With a checkpoint_journal, every commit records the last committed key of the range, and
+    a range left partially loaded by an earlier run continues after that key. expected_rows
+    (from SELECT COUNT(*)) gives the progress lines a percentage and an ETA. Returns the
+    table metrics of this call; their row count covers only rows transferred in this run.
+    """
+    table_name = table_spec['table_name']
+    column_names_ordered_from_pragma = table_spec['column_names']
+    mysql_column_types = table_spec['mysql_column_types']
+    mysql_safe_table_name = f"`{table_name}`"
+    sqlite_cursor = sqlite_conn.cursor()
+    mysql_cursor = mysql_conn.cursor()
+    try:
+        range_label = describe_key_range(table_spec, key_range)
+        key_index = column_names_ordered_from_pragma.index(table_spec['integer_key_column']) \
+            if table_spec['integer_key_column'] else None
+
+        table_metrics = new_table_metrics(table_name)
+        rows_processed = 0
+        last_committed_key = None
+        read_range = key_range
+        if checkpoint_journal is not None:
+            range_progress = journal_get_range_progress(checkpoint_journal, table_name, key_range)
+            if range_progress is not None and range_progress[0] == 'done':
+                print(f"{log_prefix}Skipping table {mysql_safe_table_name}{range_label}: already transferred ({range_progress[2]} rows).")
+                table_metrics['finished_at'] = time.time()
+                return table_metrics
+            if range_progress is not None and range_progress[0] == 'in_progress':
+                _, last_committed_key, rows_processed = range_progress
+                if key_index is None:
+                    rows_processed = 0
+                discarded_rows = discard_uncommitted_range_rows(mysql_conn, table_spec, key_range, last_committed_key)
+                print(f"{log_prefix}Resuming table {mysql_safe_table_name}{range_label} after key {last_committed_key} "
+                      f"({rows_processed} rows already committed, {discarded_rows} uncommitted rows discarded).")
+                if key_index is not None and last_committed_key is not None:
+                    read_range = (last_committed_key, key_range[1] if key_range else None)
+            journal_record_range_progress(checkpoint_journal, table_name, key_range, 'in_progress',
+                                          last_committed_key, rows_processed)
+
+        def commit_and_checkpoint(last_flushed_key):
+            commit_started_at = time.perf_counter()
+            mysql_conn.commit()
+            table_metrics['commit_seconds'] += time.perf_counter() - commit_started_at
+            if checkpoint_journal is not None:
+                journal_record_range_progress(checkpoint_journal, table_name, key_range, 'in_progress',
+                                              last_flushed_key, rows_processed)
+
+        print(f"{log_prefix}Transferring data for table {mysql_safe_table_name}{range_label}...")
+
+        insert_cols_str_mysql = ", ".join([f"`{c}`" for c in column_names_ordered_from_pragma])
+        placeholders_str = ", ".join(["%s"] * len(column_names_ordered_from_pragma))
+        insert_sql_template = f'INSERT INTO {mysql_safe_table_name} ({insert_cols_str_mysql}) VALUES ({placeholders_str});'
+        insert_sql_prefix = f'INSERT INTO {mysql_safe_table_name} ({insert_cols_str_mysql}) VALUES '
+
+        row_converter_plan = build_row_converter_plan(table_name, column_names_ordered_from_pragma, mysql_column_types)
+        insert_batch_byte_limit = get_insert_batch_byte_limit(mysql_cursor)
+
+        def insert_row_pairs(row_pairs):
+            pending, pending_bytes = [], 0
+            for row_pair in row_pairs:
+                pending.append(row_pair)
+                pending_bytes += estimate_row_bytes(row_pair[1])
+                if len(pending) >= INSERT_BATCH_ROWS or pending_bytes >= insert_batch_byte_limit:
+                    insert_row_batch(mysql_conn, mysql_cursor, insert_sql_prefix, insert_sql_template,
+                                     mysql_safe_table_name, column_names_ordered_from_pragma, pending)
+                    pending, pending_bytes = [], 0
+            if pending:
+                insert_row_batch(mysql_conn, mysql_cursor, insert_sql_prefix, insert_sql_template,
+                                 mysql_safe_table_name, column_names_ordered_from_pragma, pending)
+
+        use_load_data = table_uses_load_data(table_name)
+        if use_load_data:
+            print(f"{log_prefix}Using LOAD DATA LOCAL INFILE for table {mysql_safe_table_name}.")
+
+        rows_since_commit = 0
+        batch = []
+        batch_bytes = 0
+        last_flushed_key = last_committed_key
+        pipeline_metrics = new_pipeline_metrics() if PIPELINE_ENABLED else None
+        progress_label = f"Progress {mysql_safe_table_name}{range_label}"
+        loop_started_at = last_progress_at = time.perf_counter()
+        profiler = cProfile.Profile() if PROFILE_OUTPUT_DIR else None
+        if profiler is not None:
+            profiler.enable()
+
+        def flush_batch(final=False):
+            nonlocal use_load_data
+            execute_started_at = time.perf_counter()
+            if use_load_data:
+                still_load_data = load_row_block(mysql_conn, mysql_cursor, table_spec, batch, insert_row_pairs)
+                if not final:
+                    use_load_data = still_load_data
+            else:
+                insert_row_batch(mysql_conn, mysql_cursor, insert_sql_prefix, insert_sql_template,
+                                 mysql_safe_table_name, column_names_ordered_from_pragma, batch)
+            table_metrics['execute_seconds'] += time.perf_counter() - execute_started_at
+            table_metrics['rows'] += len(batch)
+            table_metrics['bytes'] += batch_bytes
+
+        for sqlite_rows, mysql_rows in iter_converted_row_blocks(sqlite_cursor, table_spec, read_range,
+                                                                 row_converter_plan, table_metrics, pipeline_metrics):
+            for sqlite_row_tuple, mysql_row_values in zip(sqlite_rows, mysql_rows):
+                batch.append((sqlite_row_tuple, mysql_row_values))
+                batch_bytes += estimate_row_bytes(mysql_row_values)
+                if use_load_data:
+                    if len(batch) < LOAD_DATA_FILE_MAX_ROWS:
+                        continue
+                elif len(batch) < INSERT_BATCH_ROWS and batch_bytes < insert_batch_byte_limit:
+                    continue
+                flush_batch()
+                rows_processed += len(batch)
+                rows_since_commit += len(batch)
+                if key_index is not None:
+                    last_flushed_key = batch[-1][0][key_index]
+                batch = []
+                batch_bytes = 0
+                if rows_since_commit >= COMMIT_INTERVAL_ROWS:
+                    commit_and_checkpoint(last_flushed_key)
+                    rows_since_commit = 0
+                progress_checked_at = time.perf_counter()
+                if progress_checked_at - last_progress_at >= PROGRESS_INTERVAL_SECONDS:
+                    last_progress_at = progress_checked_at
+                    print(log_prefix + format_progress(progress_label, rows_processed, expected_rows, table_metrics['rows'],
+                                                       table_metrics['bytes'], progress_checked_at - loop_started_at))
+
+        if batch:
+            flush_batch(final=True)
+            rows_processed += len(batch)
+            if key_index is not None:
+                last_flushed_key = batch[-1][0][key_index]
+        commit_started_at = time.perf_counter()
+        mysql_conn.commit()
+        table_metrics['commit_seconds'] += time.perf_counter() - commit_started_at
+        if profiler is not None:
+            profiler.disable()
+            range_suffix = "" if key_range is None or key_range == (None, None) else \
+                f".{'min' if key_range[0] is None else key_range[0]}-{'max' if key_range[1] is None else key_range[1]}"
+            profile_path = os.path.join(PROFILE_OUTPUT_DIR, f"{table_name}{range_suffix}.prof")
+            profiler.dump_stats(profile_path)
+            print(f"{log_prefix}Profile of {mysql_safe_table_name}{range_label} written to '{profile_path}'.")
+        if checkpoint_journal is not None:
+            journal_record_range_progress(checkpoint_journal, table_name, key_range, 'done', last_flushed_key, rows_processed)
+        table_metrics['engine'] = 'load_data' if use_load_data else 'insert'
+        table_metrics['finished_at'] = time.time()
+        print(f"{log_prefix}Transferred {rows_processed} rows for table {mysql_safe_table_name}{range_label}.")
+        if pipeline_metrics is not None:
+            print(f"{log_prefix}  {format_pipeline_metrics(pipeline_metrics)}")
+        return table_metrics
+    finally:
+        sqlite_cursor.close()
+        mysql_cursor.close()
+
+
+def _init_transfer_worker(profile_output_dir):
+    global PROFILE_OUTPUT_DIR
+    PROFILE_OUTPUT_DIR = profile_output_dir  # --profile is not a module constant, so pass it on
+    sys.stdout.reconfigure(line_buffering=True)  # Keep lines from concurrent workers from interleaving
+
+
+def _transfer_table_worker(sqlite_db_path, table_spec, key_range, expected_rows, checkpoint_journal_path):
+    """Runs in a worker process with its own SQLite read connection and MySQL connection."""
+    worker_name = f"worker-{os.getpid()}"
+    log_prefix = f"  [{worker_name}] "
+    sqlite_conn = open_sqlite_source_db(sqlite_db_path)
+    checkpoint_journal = open_checkpoint_journal(checkpoint_journal_path)
     mysql_conn = None
-    sqlite_conn = None
+    try:
+        mysql_conn = connect_mysql()
+        worker_cursor = mysql_conn.cursor()
+        apply_bulk_load_session_settings(worker_cursor)
+        worker_cursor.close()
+        table_metrics = transfer_table_data(sqlite_conn, mysql_conn, table_spec, log_prefix, key_range,
+                                            checkpoint_journal, expected_rows)
+        return table_metrics, key_range, worker_name
+    finally:
+        if mysql_conn and mysql_conn.is_connected(): mysql_conn.close()
+        checkpoint_journal.close()
+        sqlite_conn.close()
+
+
+def plan_transfer_tasks(sqlite_cursor, table_specs, checkpoint_journal, split_large_tables):
+    """Builds (estimated_rows, table_spec, key_range) tasks, largest first.
+
+    With split_large_tables, tables with an integer key and more than PARALLEL_CHUNK_ROWS rows
+    are split into key ranges so that one huge table is spread over several workers; the rest
+    are one task each. Sorting all tasks by size gives a longest-processing-time-first schedule.
+    Ranges are stored in the checkpoint journal, and a resumed run reuses them as they were
+    first planned; ranges already transferred are left out.
+    """
+    transfer_tasks = []
+    for table_spec in table_specs:
+        table_name = table_spec['table_name']
+        sqlite_cursor.execute(f'SELECT COUNT(*) FROM "{table_name}";')
+        table_row_count = sqlite_cursor.fetchone()[0]
+        key_ranges = journal_get_key_ranges(checkpoint_journal, table_name)
+        if not key_ranges:
+            if split_large_tables and table_spec['integer_key_column'] and table_row_count > PARALLEL_CHUNK_ROWS:
+                key_ranges = plan_key_ranges(sqlite_cursor, table_spec, PARALLEL_CHUNK_ROWS)
+                print(f"  Split `{table_name}` ({table_row_count} rows) into {len(key_ranges)} key ranges.")
+            else:
+                key_ranges = [(None, None)]
+            journal_save_key_ranges(checkpoint_journal, table_name, key_ranges)
+        for key_range in key_ranges:
+            range_progress = journal_get_range_progress(checkpoint_journal, table_name, key_range)
+            if range_progress is not None and range_progress[0] == 'done':
+                continue
+            transfer_tasks.append((table_row_count // len(key_ranges), table_spec, key_range))
+    transfer_tasks.sort(key=lambda task: task[0], reverse=True)
+    return transfer_tasks
+
+
+def transfer_tables_sequentially(sqlite_cursor, sqlite_conn, mysql_conn, table_specs, checkpoint_journal, run_metrics):
+    transfer_tasks = plan_transfer_tasks(sqlite_cursor, table_specs, checkpoint_journal, split_large_tables=False)
+    total_expected_rows = sum(task[0] for task in transfer_tasks)
+    rows_done = bytes_done = 0
+    started_at = time.perf_counter()
+    for expected_rows, table_spec, key_range in transfer_tasks:
+        print(f"\n--- Transferring table: {table_spec['table_name']} ---")
+        table_metrics = transfer_table_data(sqlite_conn, mysql_conn, table_spec, "  ", key_range, checkpoint_journal, expected_rows)
+        merge_table_metrics(run_metrics, table_metrics)
+        rows_done += table_metrics['rows']
+        bytes_done += table_metrics['bytes']
+        print("  " + format_progress("Overall", rows_done, total_expected_rows, rows_done, bytes_done,
+                                     time.perf_counter() - started_at))
+
+
+def transfer_tables_in_parallel(sqlite_cursor, sqlite_db_path, table_specs, checkpoint_journal, run_metrics):
+    """Transfers table data across MIGRATION_WORKERS processes, largest tasks first."""
+    transfer_tasks = plan_transfer_tasks(sqlite_cursor, table_specs, checkpoint_journal, split_large_tables=True)
+    checkpoint_journal_path = os.path.abspath(CHECKPOINT_JOURNAL_FILE)
+    total_expected_rows = sum(task[0] for task in transfer_tasks)
+    rows_done = bytes_done = 0
+    started_at = time.perf_counter()
+
+    print(f"\nTransferring {len(table_specs)} tables as {len(transfer_tasks)} tasks with {MIGRATION_WORKERS} worker processes...")
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=MIGRATION_WORKERS, initializer=_init_transfer_worker,
+                                                      initargs=(PROFILE_OUTPUT_DIR,))
+    try:
+        futures = [executor.submit(_transfer_table_worker, sqlite_db_path, table_spec, key_range, expected_rows,
+                                   checkpoint_journal_path)
+                   for expected_rows, table_spec, key_range in transfer_tasks]
+        for future in concurrent.futures.as_completed(futures):
+            table_metrics, key_range, worker_name = future.result()
+            table_name = table_metrics['table_name']
+            print(f"  [{worker_name}] Finished `{table_name}`{describe_key_range(table_spec_by_name(table_specs, table_name), key_range)}: "
+                  f"{table_metrics['rows']} rows in {table_wall_seconds(table_metrics):.2f}s.")
+            merge_table_metrics(run_metrics, table_metrics)
+            rows_done += table_metrics['rows']
+            bytes_done += table_metrics['bytes']
+            print("  " + format_progress("Overall", rows_done, total_expected_rows, rows_done, bytes_done,
+                                         time.perf_counter() - started_at))
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+
+
+def table_spec_by_name(table_specs, table_name):
+    return next(spec for spec in table_specs if spec['table_name'] == table_name)
+
+
+# --- Incremental Sync ---
+# After a full migration, --sync copies only what changed in the source since the last pass:
+# rows at or past the high-water marks (SYNC_UPDATED_AT_COLUMN and the integer key) are upserted
+# and a chunked primary-key diff removes rows deleted in the source. Marks are captured before
+# the rows are read, so a row changed during a pass is copied again by the next one.
+# updated_at values are compared through sync_updated_at_utc(), not as raw strings: Cloudreve's
+# formats mix ' ' and 'T' separators and UTC offsets, which do not sort lexicographically.
+_DATETIME_UTC_OFFSET_RE = re.compile(r"(?:([+\-])(\d{2}):?(\d{2})(?:\s+[A-Z_a-z]+)?|Z)(?:\s+m=[+\-]\d+\.\d+)?$")
+
+
+@functools.lru_cache(maxsize=DATETIME_CACHE_SIZE)
+def sync_updated_at_utc(value):
+    """Sortable UTC form ('YYYY-MM-DD HH:MM:SS.ffffff') of an updated_at value, None if it is not a string.
+
+    A trailing Z or numeric offset is applied; values without one are taken as UTC. Zone names
+    without a numeric offset cannot be resolved and compare on their wall-clock time.
+    """
+    wall_clock = preprocess_mysql_datetime_string(value)
+    if wall_clock is None:
+        return None
+    match_offset = _DATETIME_UTC_OFFSET_RE.search(value.strip())
+    if not match_offset or not match_offset.group(1):
+        return wall_clock
+    sign, offset_hours, offset_minutes = match_offset.groups()
+    utc_offset = datetime.timedelta(hours=int(offset_hours), minutes=int(offset_minutes))
+    try:
+        local_time = datetime.datetime.strptime(wall_clock, "%Y-%m-%d %H:%M:%S.%f")
+        utc_time = local_time - utc_offset if sign == '+' else local_time + utc_offset
+    except (ValueError, OverflowError):
+        return wall_clock
+    return utc_time.isoformat(sep=' ', timespec='microseconds')
+
+
+def capture_sync_marks(sqlite_cursor, table_spec):
+    """Returns (MAX(updated_at) in UTC, MAX(integer key)) of a source table, with None for a missing column."""
+    sqlite_cursor.connection.create_function("sync_updated_at_utc", 1, sync_updated_at_utc, deterministic=True)
+    updated_at_expr = (f'MAX(sync_updated_at_utc("{SYNC_UPDATED_AT_COLUMN}"))'
+                       if SYNC_UPDATED_AT_COLUMN in table_spec['column_names'] else "NULL")
+    key_expr = f'MAX("{table_spec["integer_key_column"]}")' if table_spec['integer_key_column'] else "NULL"
+    if updated_at_expr == key_expr == "NULL":
+        return None, None
+    sqlite_cursor.execute(f'SELECT {updated_at_expr}, {key_expr} FROM "{table_spec["table_name"]}";')
+    return tuple(sqlite_cursor.fetchone())
+
+
+def build_delta_where_sql(table_spec, sync_marks):
+    """WHERE clause for the rows changed or added since sync_marks; empty when every row qualifies.
+
+    The clause calls sync_updated_at_utc(), which capture_sync_marks registers on the connection.
+    """
+    updated_at_mark, key_mark = sync_marks if sync_marks is not None else (None, None)
+    conditions, params = [], []
+    if SYNC_UPDATED_AT_COLUMN in table_spec['column_names']:
+        if updated_at_mark is None:
+            return "", []
+        # >= also catches rows written later within the same timestamp tick.
+        conditions.append(f'sync_updated_at_utc("{SYNC_UPDATED_AT_COLUMN}") >= ?')
+        params.append(sync_updated_at_utc(updated_at_mark))  # Also normalizes raw marks from older journals
+    if table_spec['integer_key_column']:
+        if key_mark is None:
+            return "", []
+        conditions.append(f'"{table_spec["integer_key_column"]}" > ?')
+        params.append(key_mark)
+    if not conditions:
+        return "", []
+    return f" WHERE {' OR '.join(conditions)}", params
+
+
+def build_upsert_sql_suffix(table_spec):
+    update_columns = [c for c in table_spec['column_names'] if c not in table_spec['primary_key_columns']]
+    if not update_columns:
+        update_columns = table_spec['column_names'][:1]  # Key-only table: a no-op update skips duplicates
+    return " ON DUPLICATE KEY UPDATE " + ", ".join(f"`{c}` = VALUES(`{c}`)" for c in update_columns)
+
+
+def _primary_key_in_sql(primary_key_columns, key_count, quote_char, placeholder):
+    if len(primary_key_columns) == 1:
+        return f"{quote_char}{primary_key_columns[0]}{quote_char} IN ({', '.join([placeholder] * key_count)})"
+    key_columns_sql = ", ".join(f"{quote_char}{c}{quote_char}" for c in primary_key_columns)
+    key_tuple_sql = "(" + ", ".join([placeholder] * len(primary_key_columns)) + ")"
+    values_sql = ", ".join([key_tuple_sql] * key_count)
+    if quote_char == '"':
+        return f"({key_columns_sql}) IN (VALUES {values_sql})"  # SQLite needs VALUES for row-value lists
+    return f"({key_columns_sql}) IN ({values_sql})"
+
+
+def upsert_sqlite_rows(sqlite_conn, mysql_conn, table_spec, where_sql, params, commit_interval_rows=COMMIT_INTERVAL_ROWS):
+    """Copies the source rows matching where_sql with multi-row INSERT ... ON DUPLICATE KEY UPDATE.
+
+    Commits every commit_interval_rows rows (never if None). Returns the number of rows copied.
+    """
+    table_name = table_spec['table_name']
+    column_names = table_spec['column_names']
+    mysql_safe_table_name = f"`{table_name}`"
+    insert_cols_str_mysql = ", ".join([f"`{c}`" for c in column_names])
+    insert_sql_suffix = build_upsert_sql_suffix(table_spec) if table_spec['primary_key_columns'] else ""
+    insert_sql_prefix = f'INSERT INTO {mysql_safe_table_name} ({insert_cols_str_mysql}) VALUES '
+    insert_sql_template = f'{insert_sql_prefix}({", ".join(["%s"] * len(column_names))}){insert_sql_suffix};'
+    row_converter_plan = build_row_converter_plan(table_name, column_names, table_spec['mysql_column_types'])
+    select_cols_str_sqlite = ", ".join([f'"{c}"' for c in column_names])
+    sqlite_cursor = sqlite_conn.cursor()
+    mysql_cursor = mysql_conn.cursor()
+    try:
+        insert_batch_byte_limit = get_insert_batch_byte_limit(mysql_cursor)
+        sqlite_cursor.execute(f'SELECT {select_cols_str_sqlite} FROM "{table_name}"{where_sql};', params)
+        rows_copied = 0
+        rows_since_commit = 0
+        while True:
+            sqlite_rows = sqlite_cursor.fetchmany(INSERT_BATCH_ROWS)
+            if not sqlite_rows:
+                return rows_copied
+            pending, pending_bytes = [], 0
+            for row_pair in zip(sqlite_rows, convert_rows(row_converter_plan, sqlite_rows)):
+                pending.append(row_pair)
+                pending_bytes += estimate_row_bytes(row_pair[1])
+                if pending_bytes >= insert_batch_byte_limit:
+                    insert_row_batch(mysql_conn, mysql_cursor, insert_sql_prefix, insert_sql_template,
+                                     mysql_safe_table_name, column_names, pending, insert_sql_suffix)
+                    pending, pending_bytes = [], 0
+            if pending:
+                insert_row_batch(mysql_conn, mysql_cursor, insert_sql_prefix, insert_sql_template,
+                                 mysql_safe_table_name, column_names, pending, insert_sql_suffix)
+            rows_copied += len(sqlite_rows)
+            rows_since_commit += len(sqlite_rows)
+            if commit_interval_rows and rows_since_commit >= commit_interval_rows:
+                mysql_conn.commit()
+                rows_since_commit = 0
+    finally:
+        sqlite_cursor.close()
+        mysql_cursor.close()
+
+
+def sync_deleted_rows(sqlite_conn, mysql_conn, table_spec):
+    """Deletes MySQL rows whose primary key no longer exists in the source.
+
+    Tables with an integer key are compared per key range of SYNC_DELETE_CHUNK_ROWS by COUNT and
+    SUM of the key, and only differing ranges have their key lists fetched; other tables compare
+    their full key sets. Keys found only in the source (rows a delta pass missed) are copied.
+    Returns (rows_deleted, rows_copied).
+    """
+    table_name = table_spec['table_name']
+    key_column = table_spec['integer_key_column']
+    primary_key_columns = table_spec['primary_key_columns']
+    key_select_sqlite = ", ".join(f'"{c}"' for c in primary_key_columns)
+    key_select_mysql = ", ".join(f"`{c}`" for c in primary_key_columns)
+    sqlite_cursor = sqlite_conn.cursor()
+    mysql_cursor = mysql_conn.cursor()
+    rows_deleted = 0
+    rows_copied = 0
+    try:
+        for key_range in plan_key_ranges(sqlite_cursor, table_spec, SYNC_DELETE_CHUNK_ROWS):
+            where_sql_sqlite, params_sqlite = _key_range_where_sql(key_column, key_range, '"', '?')
+            where_sql_mysql, params_mysql = _key_range_where_sql(key_column, key_range, '`', '%s')
+            if key_column:
+                sqlite_cursor.execute(f'SELECT COUNT(*), COALESCE(SUM("{key_column}"), 0) '
+                                      f'FROM "{table_name}"{where_sql_sqlite};', params_sqlite)
+                mysql_cursor.execute(f"SELECT COUNT(*), COALESCE(SUM(`{key_column}`), 0) "
+                                     f"FROM `{table_name}`{where_sql_mysql};", params_mysql)
+                if tuple(map(int, sqlite_cursor.fetchone())) == tuple(map(int, mysql_cursor.fetchone())):
+                    continue
+            sqlite_cursor.execute(f'SELECT {key_select_sqlite} FROM "{table_name}"{where_sql_sqlite};', params_sqlite)
+            sqlite_keys = set(sqlite_cursor.fetchall())
+            mysql_cursor.execute(f"SELECT {key_select_mysql} FROM `{table_name}`{where_sql_mysql};", params_mysql)
+            mysql_keys = set(tuple(row) for row in mysql_cursor.fetchall())
+            deleted_keys = list(mysql_keys - sqlite_keys)
+            missing_keys = list(sqlite_keys - mysql_keys)
+            for i in range(0, len(deleted_keys), SYNC_KEY_BATCH_SIZE):
+                key_batch = deleted_keys[i:i + SYNC_KEY_BATCH_SIZE]
+                mysql_cursor.execute(f"DELETE FROM `{table_name}` WHERE "
+                                     f"{_primary_key_in_sql(primary_key_columns, len(key_batch), '`', '%s')};",
+                                     [value for key in key_batch for value in key])
+                rows_deleted += mysql_cursor.rowcount
+            for i in range(0, len(missing_keys), SYNC_KEY_BATCH_SIZE):
+                key_batch = missing_keys[i:i + SYNC_KEY_BATCH_SIZE]
+                where_sql = " WHERE " + _primary_key_in_sql(primary_key_columns, len(key_batch), '"', '?')
+                rows_copied += upsert_sqlite_rows(sqlite_conn, mysql_conn, table_spec, where_sql,
+                                                  [value for key in key_batch for value in key], None)
+        return rows_deleted, rows_copied
+    finally:
+        sqlite_cursor.close()
+        mysql_cursor.close()
+
+
+def sync_table(sqlite_conn, mysql_conn, table_spec, sync_marks):
+    """Runs one delta pass over a table. Returns (rows_upserted, rows_deleted, new_sync_marks)."""
+    table_name = table_spec['table_name']
+    sqlite_cursor = sqlite_conn.cursor()
+    try:
+        new_sync_marks = capture_sync_marks(sqlite_cursor, table_spec)
+    finally:
+        sqlite_cursor.close()
+
+    if not table_spec['primary_key_columns']:
+        print(f"  `{table_name}` has no primary key to upsert on; reloading it completely.")
+        mysql_cursor = mysql_conn.cursor()
+        try:
+            mysql_cursor.execute(f"DELETE FROM `{table_name}`;")
+            rows_deleted = mysql_cursor.rowcount
+        finally:
+            mysql_cursor.close()
+        rows_upserted = upsert_sqlite_rows(sqlite_conn, mysql_conn, table_spec, "", [], None)
+        mysql_conn.commit()
+        return rows_upserted, rows_deleted, new_sync_marks
+
+    if sync_marks is None:
+        print(f"  No high-water marks recorded for `{table_name}`; upserting every row once.")
+    where_sql, params = build_delta_where_sql(table_spec, sync_marks)
+    rows_upserted = upsert_sqlite_rows(sqlite_conn, mysql_conn, table_spec, where_sql, params)
+    mysql_conn.commit()
+    rows_deleted, rows_copied = sync_deleted_rows(sqlite_conn, mysql_conn, table_spec)
+    mysql_conn.commit()
+    return rows_upserted + rows_copied, rows_deleted, new_sync_marks
+
+
+# --- Offline Export Bundle ---
+# --export DIR writes what a migration would send to MySQL into files instead: per table a
+# create.sql, size-split data files (extended INSERTs, or TSV for LOAD DATA) and an indexes.sql,
+# plus a load.sh that loads the bundle on the database host with several mysql clients at once.
+_SQL_STRING_ESCAPES = str.maketrans({
+    "\\": "\\\\", "'": "\\'", "\0": "\\0", "\n": "\\n", "\r": "\\r", "\x1a": "\\Z",
+})
+
+EXPORT_LOAD_SCRIPT = """#!/usr/bin/env bash
+# Loads this bundle, written by main.py --export, into MySQL. Run it on (or next to) the database host:
+#   MYSQL_CMD="mysql -u cloudreve -pPASSWORD cloudreve" ./load.sh [parallel_jobs]
+# MYSQL_CMD is split on spaces on purpose, so options can be passed in it.
+set -euo pipefail
+cd "$(dirname "$0")"
+export MYSQL_CMD="${MYSQL_CMD:-mysql}"
+JOBS="${1:-4}"
+
+load_data_file() {
+    local table="$1" file="$2"
+    echo "Loading $file"
+    case "$file" in
+        *.tsv.gz) gzip -dc "$file" | $MYSQL_CMD --local-infile=1 -e "$(cat "$table/load_data.sql")" ;;
+        *.tsv) $MYSQL_CMD --local-infile=1 -e "$(cat "$table/load_data.sql")" < "$file" ;;
+        *.sql.gz) gzip -dc "$file" | $MYSQL_CMD ;;
+        *) $MYSQL_CMD < "$file" ;;
+    esac
+}
+export -f load_data_file
+
+echo "Creating tables..."
+while read -r table; do $MYSQL_CMD < "$table/create.sql"; done < tables.txt
+echo "Loading data files with $JOBS parallel jobs..."
+xargs -P "$JOBS" -n 2 bash -c 'load_data_file "$0" "$1"' < data_files.txt
+echo "Creating indexes..."
+while read -r table; do $MYSQL_CMD < "$table/indexes.sql"; done < tables.txt
+echo "Bundle loaded."
+"""
+
+
+def encode_sql_literal(value):
+    """Renders one converted value as a MySQL literal for the extended INSERT files."""
+    if value is None:
+        return b"NULL"
+    if isinstance(value, bool):
+        return b"1" if value else b"0"
+    if isinstance(value, float):
+        return repr(value).encode('ascii')
+    if isinstance(value, (int, decimal.Decimal)):
+        return str(value).encode('ascii')
+    if isinstance(value, (bytes, bytearray)):
+        return b"X'" + bytes(value).hex().encode('ascii') + b"'"
+    return b"'" + str(value).translate(_SQL_STRING_ESCAPES).encode('utf-8') + b"'"
+
+
+def export_session_header():
+    """Session settings at the top of every exported SQL file, mirroring apply_bulk_load_session_settings."""
+    header_lines = [
+        f"SET NAMES {MYSQL_CHARSET} COLLATE {MYSQL_COLLATION};",
+        "SET SESSION sql_mode=REPLACE(@@sql_mode, 'NO_BACKSLASH_ESCAPES', '');",
+        "SET SESSION unique_checks=0;",
+        "SET SESSION foreign_key_checks=0;",
+    ]
+    if BULK_LOAD_DISABLE_BINLOG:
+        header_lines.append("SET SESSION sql_log_bin=0;")
+    return "\n".join(header_lines) + "\n"
+
+
+def open_export_file(path):
+    if EXPORT_COMPRESS:
+        return gzip.open(path, 'wb', compresslevel=EXPORT_GZIP_LEVEL)
+    return open(path, 'wb')
+
+
+def export_table_schema(sqlite_cursor, table_spec, export_dir):
+    """Writes create.sql, indexes.sql and, for TSV bundles, load_data.sql of one table."""
+    table_name = table_spec['table_name']
+    mysql_safe_table_name = f"`{table_name}`"
+    table_dir = os.path.join(export_dir, table_name)
+    os.makedirs(table_dir, exist_ok=True)
+    with open(os.path.join(table_dir, 'create.sql'), 'w', encoding='utf-8') as schema_file:
+        schema_file.write(export_session_header())
+        schema_file.write(f"DROP TABLE IF EXISTS {mysql_safe_table_name};\n{table_spec['create_table_sql']}\n")
+
+    post_load_statements = []
+    index_clauses = build_mysql_index_clauses(table_spec)
+    if index_clauses:
+        post_load_statements.append(f"ALTER TABLE {mysql_safe_table_name}\n  " + ",\n  ".join(index_clauses) + ";")
+    if table_spec['has_auto_increment_id']:
+        sqlite_cursor.execute(f'SELECT COALESCE(MAX("id"), 0) FROM "{table_name}";')
+        post_load_statements.append(f"ALTER TABLE {mysql_safe_table_name} AUTO_INCREMENT = {sqlite_cursor.fetchone()[0] + 1};")
+    with open(os.path.join(table_dir, 'indexes.sql'), 'w', encoding='utf-8') as post_load_file:
+        post_load_file.write("".join(statement + "\n" for statement in post_load_statements))
+
+    if EXPORT_FORMAT == 'tsv':
+        with open(os.path.join(table_dir, 'load_data.sql'), 'w', encoding='utf-8') as load_data_file:
+            load_data_file.write(export_session_header())
+            load_data_file.write(build_load_data_sql(table_spec, "'/dev/stdin'") + "\n")
+    return len(index_clauses)
+
+
+def export_table_data(sqlite_conn, table_spec, export_dir, log_prefix="  ", key_range=None, range_index=0):
+    """Converts the rows of one table (or key range) and writes them to size-split data files.
+
+    SQL files hold extended INSERTs of up to EXPORT_INSERT_MAX_BYTES, each file one transaction;
+    TSV files hold rows encoded like write_load_data_file. A file is closed once it reaches
+    EXPORT_FILE_MAX_BYTES (uncompressed). Returns (table_metrics, [(relative_path, rows)]).
+    """
+    table_name = table_spec['table_name']
+    column_names_ordered_from_pragma = table_spec['column_names']
+    mysql_safe_table_name = f"`{table_name}`"
+    range_label = describe_key_range(table_spec, key_range)
+    use_tsv = EXPORT_FORMAT == 'tsv'
+    file_extension = ("tsv" if use_tsv else "sql") + (".gz" if EXPORT_COMPRESS else "")
+    insert_cols_str_mysql = ", ".join([f"`{c}`" for c in column_names_ordered_from_pragma])
+    insert_sql_prefix = f"INSERT INTO {mysql_safe_table_name} ({insert_cols_str_mysql}) VALUES\n".encode('utf-8')
+    row_converter_plan = build_row_converter_plan(table_name, column_names_ordered_from_pragma, table_spec['mysql_column_types'])
+    table_metrics = new_table_metrics(table_name)
+    table_metrics['engine'] = f"export_{EXPORT_FORMAT}"
+    sqlite_cursor = sqlite_conn.cursor()
+    exported_files = []
+    data_file = None
+    file_rows = file_bytes = 0
+    statement_rows = []
+    statement_bytes = 0
+    print(f"{log_prefix}Exporting data for table {mysql_safe_table_name}{range_label}...")
+
+    def close_data_file():
+        nonlocal data_file
+        if data_file is None:
+            return
+        if not use_tsv:
+            data_file.write(b"COMMIT;\n")
+        data_file.close()
+        data_file = None
+        table_metrics['bytes'] += file_bytes
+
+    def write_data(chunk, rows):
+        nonlocal data_file, file_rows, file_bytes
+        if data_file is None:
+            relative_path = f"{table_name}/data.{range_index:04d}.{len(exported_files) + 1:04d}.{file_extension}"
+            data_file = open_export_file(os.path.join(export_dir, relative_path))
+            exported_files.append([relative_path, 0])
+            file_rows = file_bytes = 0
+            if not use_tsv:
+                data_file.write(export_session_header().encode('utf-8') + b"START TRANSACTION;\n")
+        data_file.write(chunk)
+        file_rows += rows
+        file_bytes += len(chunk)
+        exported_files[-1][1] = file_rows
+        if file_bytes >= EXPORT_FILE_MAX_BYTES:
+            close_data_file()
+
+    def flush_statement():
+        nonlocal statement_rows, statement_bytes
+        write_data(insert_sql_prefix + b",\n".join(statement_rows) + b";\n", len(statement_rows))
+        statement_rows = []
+        statement_bytes = 0
+
+    try:
+        for _, mysql_rows in iter_converted_row_blocks(sqlite_cursor, table_spec, key_range, row_converter_plan, table_metrics):
+            write_started_at = time.perf_counter()
+            if use_tsv:
+                write_data(b"".join(b"\t".join([encode_load_data_field(value) for value in mysql_row_values]) + b"\n"
+                                    for mysql_row_values in mysql_rows), len(mysql_rows))
+            else:
+                for mysql_row_values in mysql_rows:
+                    row_literal = b"(" + b",".join([encode_sql_literal(value) for value in mysql_row_values]) + b")"
+                    if statement_rows and statement_bytes + len(row_literal) > EXPORT_INSERT_MAX_BYTES:
+                        flush_statement()
+                    statement_rows.append(row_literal)
+                    statement_bytes += len(row_literal) + 2
+            table_metrics['rows'] += len(mysql_rows)
+            table_metrics['execute_seconds'] += time.perf_counter() - write_started_at
+        write_started_at = time.perf_counter()
+        if statement_rows:
+            flush_statement()
+        close_data_file()
+        table_metrics['execute_seconds'] += time.perf_counter() - write_started_at
+    finally:
+        if data_file is not None:
+            data_file.close()
+        sqlite_cursor.close()
+    table_metrics['finished_at'] = time.time()
+    print(f"{log_prefix}Exported {table_metrics['rows']} rows for table {mysql_safe_table_name}{range_label} "
+          f"into {len(exported_files)} files.")
+    return table_metrics, [tuple(exported_file) for exported_file in exported_files]
+
+
+def _export_table_worker(sqlite_db_path, table_spec, export_dir, key_range, range_index):
+    """Runs in a worker process with its own SQLite read connection."""
+    worker_name = f"worker-{os.getpid()}"
+    sqlite_conn = open_sqlite_source_db(sqlite_db_path)
+    try:
+        table_metrics, exported_files = export_table_data(sqlite_conn, table_spec, export_dir, f"  [{worker_name}] ",
+                                                          key_range, range_index)
+        return table_metrics, exported_files
+    finally:
+        sqlite_conn.close()
+
+
+def write_export_bundle_index(export_dir, table_specs, exported_files, run_metrics):
+    """Writes tables.txt, data_files.txt (largest first, for load.sh), load.sh and manifest.json."""
+    with open(os.path.join(export_dir, 'tables.txt'), 'w', encoding='utf-8') as tables_file:
+        tables_file.write("".join(spec['table_name'] + "\n" for spec in table_specs))
+    files_by_size = sorted(exported_files, key=lambda exported: os.path.getsize(os.path.join(export_dir, exported[1])),
+                           reverse=True)
+    with open(os.path.join(export_dir, 'data_files.txt'), 'w', encoding='utf-8') as data_files_file:
+        data_files_file.write("".join(f"{table_name} {relative_path}\n" for table_name, relative_path, _ in files_by_size))
+    load_script_path = os.path.join(export_dir, 'load.sh')
+    with open(load_script_path, 'w', encoding='utf-8') as load_script_file:
+        load_script_file.write(EXPORT_LOAD_SCRIPT)
+    os.chmod(load_script_path, 0o755)
+
+    manifest = {
+        'format': EXPORT_FORMAT,
+        'compressed': EXPORT_COMPRESS,
+        'charset': MYSQL_CHARSET,
+        'collation': MYSQL_COLLATION,
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(run_metrics['started_at'])),
+        'tables': [{
+            'table_name': spec['table_name'],
+            'rows': sum(rows for table_name, _, rows in exported_files if table_name == spec['table_name']),
+            'files': [{'path': relative_path, 'rows': rows, 'bytes': os.path.getsize(os.path.join(export_dir, relative_path))}
+                      for table_name, relative_path, rows in exported_files if table_name == spec['table_name']],
+        } for spec in table_specs],
+    }
+    with open(os.path.join(export_dir, 'manifest.json'), 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+
+# --- Post-Migration Verification ---
+# Both sides reduce each key range to (COUNT(*), SUM(CRC32(row text))). MySQL does it server-side;
+# SQLite calls mysql_row_crc(), a registered Python function that converts the source row exactly
+# as the transfer does and renders each value the way MySQL prints it in CONCAT_WS. Ranges whose
+# checksums differ are split again and finally compared row by row on the key.
+VERIFY_SEPARATOR = '#'
+
+
+def verify_column_kind(mysql_type):
+    mysql_type_upper = mysql_type.upper()
+    if mysql_type_upper.startswith("TINYINT") or mysql_type_upper.startswith("BIGINT"):
+        return 'integer'
+    if mysql_type_upper == "DOUBLE":
+        return 'double'
+    if mysql_type_upper.startswith("TIMESTAMP") or mysql_type_upper.startswith("DATETIME"):
+        return 'timestamp'
+    if mysql_type_upper == "JSON":
+        return 'json'
+    if mysql_type_upper.startswith("CHAR("):
+        return 'char'
+    if "BLOB" in mysql_type_upper:
+        return 'blob'
+    return 'text'
+
+
+def table_verify_column_kinds(table_spec):
+    """verify_column_kind of every column; JSON is hashed as text if the spec says the server keeps JSON text as stored."""
+    column_kinds = [verify_column_kind(mysql_type) for mysql_type in table_spec['mysql_column_types']]
+    if table_spec.get('verify_json_as_text'):
+        column_kinds = ['text' if column_kind == 'json' else column_kind for column_kind in column_kinds]
+    return column_kinds
+
+
+def is_mariadb_server(mysql_cursor):
+    """MariaDB's JSON is an alias for LONGTEXT, so it returns JSON columns exactly as they were inserted."""
+    mysql_cursor.execute("SELECT VERSION();")
+    return 'mariadb' in str(mysql_cursor.fetchone()[0]).lower()
+
+
+def _verify_text_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode('utf-8')
+
+
+def _verify_char_bytes(value):
+    return _verify_text_bytes(value).rstrip(b' ')  # MySQL strips trailing spaces when reading CHAR
+
+
+def _verify_integer_bytes(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if not isinstance(value, (int, float)):
+        return _verify_text_bytes(value)
+    return str(value).encode('utf-8')
+
+
+def _verify_double_bytes(value):
+    # MySQL side is CAST(col AS DECIMAL(65,10)): round half up from the shortest repr.
+    if not isinstance(value, (int, float)):
+        return _verify_text_bytes(value)
+    quantized = decimal.Decimal(repr(float(value))).quantize(decimal.Decimal('1e-10'), rounding=decimal.ROUND_HALF_UP)
+    return format(quantized + 0, 'f').encode('ascii')
+
+
+def _mysql_json_text(value):
+    """Renders parsed JSON the way MySQL prints a JSON column: keys sorted by length, then bytes."""
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda item: (len(item[0].encode('utf-8')), item[0].encode('utf-8')))
+        return "{" + ", ".join(f"{json.dumps(key, ensure_ascii=False)}: {_mysql_json_text(item_value)}"
+                               for key, item_value in items) + "}"
+    if isinstance(value, list):
+        return "[" + ", ".join(_mysql_json_text(item_value) for item_value in value) + "]"
+    if isinstance(value, float):
+        number_text = repr(value)
+        if 'e' in number_text:
+            mantissa, exponent = number_text.split('e')
+            number_text = f"{mantissa}e{int(exponent)}"
+        return number_text
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _verify_json_bytes(value):
+    try:
+        return _mysql_json_text(json.loads(value)).encode('utf-8')
+    except (TypeError, ValueError):
+        return _verify_text_bytes(value)
+
+
+_VERIFY_VALUE_ENCODERS = {
+    'integer': _verify_integer_bytes,
+    'double': _verify_double_bytes,
+    'timestamp': _verify_text_bytes,
+    'json': _verify_json_bytes,
+    'char': _verify_char_bytes,
+    'blob': _verify_text_bytes,
+    'text': _verify_text_bytes,
+}
+
+
+def build_row_checksum_function(table_spec):
+    """Returns the Python side of the row checksum for SQLite source rows of one table."""
+    row_converter_plan = build_row_converter_plan(table_spec['table_name'], table_spec['column_names'],
+                                                  table_spec['mysql_column_types'])
+    value_encoders = [_VERIFY_VALUE_ENCODERS[column_kind] for column_kind in table_verify_column_kinds(table_spec)]
+    separator = VERIFY_SEPARATOR.encode('ascii')
+
+    def mysql_row_crc(*sqlite_row_values):
+        parts = []
+        null_flags = []
+        for value, encode_value in zip(convert_row(row_converter_plan, sqlite_row_values), value_encoders):
+            if value is None:
+                null_flags.append('1')  # CONCAT_WS skips NULLs, so NULL positions are hashed separately
+            else:
+                null_flags.append('0')
+                parts.append(encode_value(value))
+        parts.append(''.join(null_flags).encode('ascii'))
+        return zlib.crc32(separator.join(parts))
+    return mysql_row_crc
+
+
+def build_mysql_row_checksum_sql(table_spec):
+    """MySQL side of the row checksum; must render values exactly like build_row_checksum_function."""
+    value_exprs = []
+    for col_name, column_kind in zip(table_spec['column_names'], table_verify_column_kinds(table_spec)):
+        if column_kind == 'double':
+            value_exprs.append(f"CAST(`{col_name}` AS DECIMAL(65,10))")
+        else:
+            value_exprs.append(f"`{col_name}`")
+    null_flags_expr = "CONCAT(" + ", ".join(f"ISNULL(`{col_name}`)" for col_name in table_spec['column_names']) + ")"
+    return f"CRC32(CONCAT_WS('{VERIFY_SEPARATOR}', {', '.join(value_exprs)}, {null_flags_expr}))"
+
+
+def _key_range_where_sql(key_column, key_range, quote_char, placeholder):
+    conditions, params = [], []
+    lower_key, upper_key = key_range if key_range is not None else (None, None)
+    if key_column and lower_key is not None:
+        conditions.append(f"{quote_char}{key_column}{quote_char} > {placeholder}")
+        params.append(lower_key)
+    if key_column and upper_key is not None:
+        conditions.append(f"{quote_char}{key_column}{quote_char} <= {placeholder}")
+        params.append(upper_key)
+    return (f" WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+
+def checksum_key_range(sqlite_conn, mysql_cursor, table_spec, key_range):
+    """Returns ((sqlite_rows, sqlite_checksum), (mysql_rows, mysql_checksum)) for one key range."""
+    table_name = table_spec['table_name']
+    key_column = table_spec['integer_key_column']
+    sqlite_conn.create_function("mysql_row_crc", -1, build_row_checksum_function(table_spec), deterministic=True)
+    select_cols_str_sqlite = ", ".join([f'"{c}"' for c in table_spec['column_names']])
+    where_sql, params = _key_range_where_sql(key_column, key_range, '"', '?')
+    sqlite_cursor = sqlite_conn.cursor()
+    try:
+        sqlite_cursor.execute(f'SELECT COUNT(*), COALESCE(SUM(mysql_row_crc({select_cols_str_sqlite})), 0) '
+                              f'FROM "{table_name}"{where_sql};', params)
+        sqlite_rows, sqlite_checksum = sqlite_cursor.fetchone()
+    finally:
+        sqlite_cursor.close()
+    where_sql, params = _key_range_where_sql(key_column, key_range, '`', '%s')
+    mysql_cursor.execute(f"SELECT COUNT(*), COALESCE(SUM({build_mysql_row_checksum_sql(table_spec)}), 0) "
+                         f"FROM `{table_name}`{where_sql};", params)
+    mysql_rows, mysql_checksum = mysql_cursor.fetchone()
+    return (int(sqlite_rows), int(sqlite_checksum)), (int(mysql_rows), int(mysql_checksum))
+
+
+def diff_key_range_rows(sqlite_conn, mysql_cursor, table_spec, key_range):
+    """Compares one (small) key range row by row.
+
+    Returns (missing_in_mysql, extra_in_mysql, different) lists of keys. Tables without an
+    integer key are compared as multisets of row checksums, so the lists hold checksums instead.
+    """
+    table_name = table_spec['table_name']
+    key_column = table_spec['integer_key_column']
+    sqlite_conn.create_function("mysql_row_crc", -1, build_row_checksum_function(table_spec), deterministic=True)
+    select_cols_str_sqlite = ", ".join([f'"{c}"' for c in table_spec['column_names']])
+    key_select_sqlite = f'"{key_column}"' if key_column else "NULL"
+    key_select_mysql = f"`{key_column}`" if key_column else "NULL"
+    where_sql, params = _key_range_where_sql(key_column, key_range, '"', '?')
+    sqlite_cursor = sqlite_conn.cursor()
+    try:
+        sqlite_cursor.execute(f'SELECT {key_select_sqlite}, mysql_row_crc({select_cols_str_sqlite}) '
+                              f'FROM "{table_name}"{where_sql};', params)
+        sqlite_row_checksums = sqlite_cursor.fetchall()
+    finally:
+        sqlite_cursor.close()
+    where_sql, params = _key_range_where_sql(key_column, key_range, '`', '%s')
+    mysql_cursor.execute(f"SELECT {key_select_mysql}, {build_mysql_row_checksum_sql(table_spec)} "
+                         f"FROM `{table_name}`{where_sql};", params)
+    mysql_row_checksums = [(key, int(row_checksum)) for key, row_checksum in mysql_cursor.fetchall()]
+
+    if not key_column:
+        sqlite_counts, mysql_counts = {}, {}
+        for _, row_checksum in sqlite_row_checksums:
+            sqlite_counts[row_checksum] = sqlite_counts.get(row_checksum, 0) + 1
+        for _, row_checksum in mysql_row_checksums:
+            mysql_counts[row_checksum] = mysql_counts.get(row_checksum, 0) + 1
+        missing = [c for c, n in sqlite_counts.items() for _ in range(n - mysql_counts.get(c, 0))]
+        extra = [c for c, n in mysql_counts.items() for _ in range(n - sqlite_counts.get(c, 0))]
+        return missing, extra, []
+
+    sqlite_by_key = dict(sqlite_row_checksums)
+    mysql_by_key = dict(mysql_row_checksums)
+    missing = sorted(key for key in sqlite_by_key if key not in mysql_by_key)
+    extra = sorted(key for key in mysql_by_key if key not in sqlite_by_key)
+    different = sorted(key for key, row_checksum in sqlite_by_key.items()
+                       if key in mysql_by_key and mysql_by_key[key] != row_checksum)
+    return missing, extra, different
+
+
+def _verify_chunk_worker(sqlite_db_path, table_spec, key_range):
+    """Runs in a worker process; returns (table_name, key_range, sqlite_result, mysql_result)."""
+    sqlite_conn = open_sqlite_source_db(sqlite_db_path)
+    mysql_conn = None
+    try:
+        mysql_conn = connect_mysql()
+        mysql_cursor = mysql_conn.cursor()
+        try:
+            sqlite_result, mysql_result = checksum_key_range(sqlite_conn, mysql_cursor, table_spec, key_range)
+        finally:
+            mysql_cursor.close()
+        return table_spec['table_name'], key_range, sqlite_result, mysql_result
+    finally:
+        if mysql_conn and mysql_conn.is_connected(): mysql_conn.close()
+        sqlite_conn.close()
+
+
+def verify_migration(sqlite_conn, sqlite_db_path, mysql_conn, table_specs, run_metrics=None):
+    """Compares every table of the SQLite source with its MySQL copy. Returns True if all match.
+
+    Row counts are compared first; then every table is checksummed in key ranges of
+    VERIFY_CHUNK_ROWS, in VERIFY_WORKERS processes when sqlite_db_path is given. Differing ranges
+    are split until they hold at most VERIFY_ROW_DIFF_ROWS rows and then compared row by row.
+    """
+    print("\n--- Verifying MySQL data against the SQLite source ---")
+    phase_started_at = time.perf_counter()
+    sqlite_cursor = sqlite_conn.cursor()
+    mysql_cursor = mysql_conn.cursor()
+    executor = None
+    table_results = {}
+    try:
+        if is_mariadb_server(mysql_cursor):
+            print("MariaDB server detected: JSON columns are compared as stored text.")
+            table_specs = [dict(table_spec, verify_json_as_text=True) for table_spec in table_specs]
+        for table_spec in table_specs:
+            table_name = table_spec['table_name']
+            sqlite_cursor.execute(f'SELECT COUNT(*) FROM "{table_name}";')
+            mysql_cursor.execute(f"SELECT COUNT(*) FROM `{table_name}`;")
+            table_results[table_name] = {
+                'sqlite_rows': sqlite_cursor.fetchone()[0],
+                'mysql_rows': mysql_cursor.fetchone()[0],
+                'ranges_checked': 0,
+                'ranges_different': 0,
+                'missing_in_mysql': [],
+                'extra_in_mysql': [],
+                'different': [],
+            }
+
+        pending_ranges = [(table_spec, key_range) for table_spec in table_specs
+                          for key_range in plan_key_ranges(sqlite_cursor, table_spec, VERIFY_CHUNK_ROWS)]
+        if VERIFY_WORKERS > 1 and sqlite_db_path and len(pending_ranges) > 1:
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=VERIFY_WORKERS)
+        while pending_ranges:
+            if executor is not None:
+                futures = [executor.submit(_verify_chunk_worker, sqlite_db_path, table_spec, key_range)
+                           for table_spec, key_range in pending_ranges]
+                checksum_results = [future.result()[2:] for future in futures]
+            else:
+                checksum_results = [checksum_key_range(sqlite_conn, mysql_cursor, table_spec, key_range)
+                                    for table_spec, key_range in pending_ranges]
+            next_ranges = []
+            for (table_spec, key_range), (sqlite_result, mysql_result) in zip(pending_ranges, checksum_results):
+                table_result = table_results[table_spec['table_name']]
+                table_result['ranges_checked'] += 1
+                if sqlite_result == mysql_result:
+                    continue
+                table_result['ranges_different'] += 1
+                # Splitting only pays off while the range is large and has an integer key to split on.
+                sub_ranges = [key_range]
+                if table_spec['integer_key_column'] and max(sqlite_result[0], mysql_result[0]) > VERIFY_ROW_DIFF_ROWS:
+                    sub_ranges = plan_key_ranges(sqlite_cursor, table_spec,
+                                                 max(VERIFY_ROW_DIFF_ROWS, sqlite_result[0] // 16), key_range)
+                if len(sub_ranges) > 1:
+                    next_ranges.extend((table_spec, sub_range) for sub_range in sub_ranges)
+                    continue
+                missing, extra, different = diff_key_range_rows(sqlite_conn, mysql_cursor, table_spec, key_range)
+                table_result['missing_in_mysql'].extend(missing)
+                table_result['extra_in_mysql'].extend(extra)
+                table_result['different'].extend(different)
+            pending_ranges = next_ranges
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        sqlite_cursor.close()
+        mysql_cursor.close()
+
+    all_match = True
+    for table_name, table_result in table_results.items():
+        row_differences = (len(table_result['missing_in_mysql']) + len(table_result['extra_in_mysql'])
+                           + len(table_result['different']))
+        table_matches = table_result['sqlite_rows'] == table_result['mysql_rows'] and row_differences == 0 \
+            and table_result['ranges_different'] == 0
+        all_match = all_match and table_matches
+        print(f"  {table_name:<32} {table_result['sqlite_rows']:>12} / {table_result['mysql_rows']:>12} rows  "
+              f"{'OK' if table_matches else 'MISMATCH'}")
+        if table_matches:
+            continue
+        key_label = "keys" if table_spec_by_name(table_specs, table_name)['integer_key_column'] else "row checksums"
+        for label, keys in (("missing in MySQL", table_result['missing_in_mysql']),
+                            ("extra in MySQL", table_result['extra_in_mysql']),
+                            ("different", table_result['different'])):
+            if keys:
+                shown_keys = ", ".join(str(key) for key in keys[:VERIFY_REPORT_MAX_KEYS])
+                more_keys = f", ... ({len(keys)} total)" if len(keys) > VERIFY_REPORT_MAX_KEYS else ""
+                print(f"    {label} ({key_label}): {shown_keys}{more_keys}")
+    elapsed = time.perf_counter() - phase_started_at
+    print(f"  Verification {'passed' if all_match else 'FAILED'} in {elapsed:.2f}s.")
+    record_phase(run_metrics, "verify", elapsed)
+    if run_metrics is not None:
+        run_metrics['verification'] = {
+            table_name: {label: value[:VERIFY_REPORT_MAX_KEYS] if isinstance(value, list) else value
+                         for label, value in table_result.items()}
+            for table_name, table_result in table_results.items()
+        }
+    return all_match
+
+
+def open_sqlite_source(run_metrics=None, immutable=True):
+    """Opens SQLITE_SOURCE_DB read-only, or loads SQLITE_DUMP_FILE into a temporary database.
+
+    Returns (sqlite_conn, temp_sqlite_db_path); the path is None when the source is read directly.
+    """
+    if use_direct_sqlite_source():
+        print(f"Opening SQLite database '{SQLITE_SOURCE_DB}' directly (read-only)...")
+        return open_sqlite_source_db(SQLITE_SOURCE_DB, immutable), None
+    phase_started_at = time.perf_counter()
     db_fd, temp_sqlite_db_path = tempfile.mkstemp(suffix=".sqlite")
     os.close(db_fd)
     print(f"Using temporary SQLite database: {temp_sqlite_db_path}")
+    print(f"Loading SQLite dump from '{SQLITE_DUMP_FILE}' into temporary DB...")
+    sqlite_conn = sqlite3.connect(temp_sqlite_db_path, check_same_thread=False)
+    try:
+        load_sqlite_dump(sqlite_conn, SQLITE_DUMP_FILE)
+    except BaseException:
+        sqlite_conn.close()
+        remove_temp_sqlite_db(temp_sqlite_db_path)
+        raise
+    print("SQLite dump loaded successfully.")
+    record_phase(run_metrics, "dump load", time.perf_counter() - phase_started_at)
+    return sqlite_conn, temp_sqlite_db_path
+
+
+def remove_temp_sqlite_db(temp_sqlite_db_path):
+    if temp_sqlite_db_path and os.path.exists(temp_sqlite_db_path):
+        try:
+            os.remove(temp_sqlite_db_path)
+            print(f"Temporary SQLite database '{temp_sqlite_db_path}' removed.")
+        except OSError as e_remove:
+            print(f"Error removing temp SQLite DB '{temp_sqlite_db_path}': {e_remove}")
+
+
+def migrate_data(resume=False, run_metrics=None):
+    mysql_conn = None
+    sqlite_conn = None
+    checkpoint_journal = None
+    temp_sqlite_db_path = None
     migrated_tables_info = []
+    if run_metrics is None:
+        run_metrics = new_run_metrics()
 
     try:
-        print(f"Loading SQLite dump from '{SQLITE_DUMP_FILE}' into temporary DB...")
-        sqlite_conn = sqlite3.connect(temp_sqlite_db_path)
+        sqlite_conn, temp_sqlite_db_path = open_sqlite_source(run_metrics)
+        sqlite_db_path = SQLITE_SOURCE_DB if temp_sqlite_db_path is None else temp_sqlite_db_path
         sqlite_cursor = sqlite_conn.cursor()
-        with open(SQLITE_DUMP_FILE, 'r', encoding='utf-8', errors='replace') as f_dump:
-            sql_script = f_dump.read()
-            sqlite_cursor.executescript(sql_script)
-            sqlite_conn.commit()
-        print("SQLite dump loaded successfully.")
 
         print(f"Connecting to MySQL database '{MYSQL_DBNAME}' on {MYSQL_HOST}:{MYSQL_PORT}...")
-        mysql_conn = mysql.connector.connect(
-            host=MYSQL_HOST, port=MYSQL_PORT, user=MYSQL_USER, password=MYSQL_PASSWORD,
-            database=MYSQL_DBNAME, charset=MYSQL_CHARSET, use_unicode=True
-        )
+        mysql_conn = connect_mysql()
         mysql_cursor = mysql_conn.cursor()
         print("Connected to MySQL successfully.")
 
@@ -196,145 +2564,64 @@ def migrate_data():
             return []
         print(f"Found tables in SQLite: {', '.join(tables)}")
 
+        checkpoint_journal = open_checkpoint_journal(CHECKPOINT_JOURNAL_FILE, reset=not resume)
+        if resume:
+            print(f"Resuming from checkpoint journal '{CHECKPOINT_JOURNAL_FILE}'.")
+
+        phase_started_at = time.perf_counter()
+        table_specs = []
+        table_statuses = {}
         for table_name in tables:
             print(f"\n--- Processing table: {table_name} ---")
-            mysql_safe_table_name = f"`{table_name}`"
-
-            sqlite_cursor.execute(f'PRAGMA table_info("{table_name}");')
-            schema_info = sqlite_cursor.fetchall()
-            if not schema_info:
-                print(f"Could not get schema for {table_name}. Skipping.")
+            table_status = journal_get_table_status(checkpoint_journal, table_name)
+            if table_status is not None:
+                print(f"  Keeping existing table `{table_name}` (resuming).")
+            table_spec = create_mysql_table(sqlite_cursor, mysql_cursor, table_name, recreate=table_status is None)
+            if table_spec is not None:
+                table_specs.append(table_spec)
+                if table_status is None:
+                    table_status = 'created'
+                    journal_set_table_status(checkpoint_journal, table_name, table_status)
+                table_statuses[table_name] = table_status
+        record_phase(run_metrics, "create tables", time.perf_counter() - phase_started_at)
+        pending_load_specs = [spec for spec in table_specs if table_statuses[spec['table_name']] == 'created']
+
+        # High-water marks for --sync are taken before the copy, so rows changed during it are synced later.
+        for table_spec in pending_load_specs:
+            if journal_get_sync_marks(checkpoint_journal, table_spec['table_name']) is None:
+                journal_save_sync_marks(checkpoint_journal, table_spec['table_name'],
+                                        capture_sync_marks(sqlite_cursor, table_spec))
+
+        # Secondary indexes are added after the load, so rows go into tables with only a PRIMARY KEY.
+        phase_started_at = time.perf_counter()
+        apply_bulk_load_session_settings(mysql_cursor)
+        if MIGRATION_WORKERS > 1:
+            transfer_tables_in_parallel(sqlite_cursor, sqlite_db_path, pending_load_specs, checkpoint_journal, run_metrics)
+        else:
+            transfer_tables_sequentially(sqlite_cursor, sqlite_conn, mysql_conn, pending_load_specs, checkpoint_journal, run_metrics)
+        for table_spec in pending_load_specs:
+            table_statuses[table_spec['table_name']] = 'loaded'
+            journal_set_table_status(checkpoint_journal, table_spec['table_name'], 'loaded')
+        record_phase(run_metrics, "data transfer", time.perf_counter() - phase_started_at)
+        print_table_timing_summary(run_metrics)
+
+        print("\n--- Creating secondary indexes ---")
+        phase_started_at = time.perf_counter()
+        indexes_created = 0
+        for table_spec in table_specs:
+            if table_statuses[table_spec['table_name']] == 'indexed':
                 continue
-
-            column_definitions = []
-            pk_column_tuples = []
-            column_names_ordered_from_pragma = []
-            table_has_auto_increment_id = False
-
-            for col_pragma in schema_info:
-                col_name, col_type_sqlite, col_notnull_flag, col_dflt_val_sqlite, col_pk_order = col_pragma[1], col_pragma[2], col_pragma[3], col_pragma[4], col_pragma[5]
-                mysql_safe_col_name = f"`{col_name}`"
-                column_names_ordered_from_pragma.append(col_name)
-
-                is_part_of_pk = (col_pk_order > 0)
-                is_sqlite_col_not_null = (col_notnull_flag == 1)
-                mysql_col_type = get_mysql_column_type(col_type_sqlite, col_name, table_name, is_part_of_pk)
-
-                col_def = f"{mysql_safe_col_name} {mysql_col_type}"
-                if "AUTO_INCREMENT" in mysql_col_type.upper():
-                    table_has_auto_increment_id = True
-                else:
-                    if is_sqlite_col_not_null: col_def += " NOT NULL"
-
-                    # Pass is_sqlite_col_not_null to decide if DEFAULT NULL is appropriate
-                    mysql_default = get_mysql_default_value(col_dflt_val_sqlite, mysql_col_type, col_name, table_name, is_sqlite_col_not_null)
-                    if mysql_default is not None:
-                        # Only add DEFAULT NULL if column is nullable and SQLite default was NULL
-                        if mysql_default == "NULL" and not is_sqlite_col_not_null:
-                            col_def += " DEFAULT NULL"
-                        elif mysql_default != "NULL": # For any other non-NULL default value
-                            col_def += f" DEFAULT {mysql_default}"
-                        # If mysql_default is "NULL" but col is NOT NULL, DEFAULT clause is omitted.
-                        # If mysql_default is None (e.g. for TEXT), DEFAULT clause is omitted.
-
-                column_definitions.append(col_def)
-                if is_part_of_pk :
-                    pk_column_tuples.append((col_pk_order, mysql_safe_col_name))
-
-            print(f"  Dropping and Creating table {mysql_safe_table_name} in MySQL...")
-            try:
-                mysql_cursor.execute(f'SET FOREIGN_KEY_CHECKS=0;')
-                mysql_cursor.execute(f'DROP TABLE IF EXISTS {mysql_safe_table_name};')
-            except mysql.connector.Error as e_drop:
-                print(f"    Warning: Could not drop table {mysql_safe_table_name} (may not exist): {e_drop}")
-            finally:
-                 mysql_cursor.execute(f'SET FOREIGN_KEY_CHECKS=1;')
-
-            create_table_sql = f'CREATE TABLE {mysql_safe_table_name} (\n  ' + ",\n  ".join(column_definitions)
-            if pk_column_tuples:
-                pk_column_tuples.sort(key=lambda x: x[0])
-                sorted_pk_col_names = [col_name_quoted for pk_order, col_name_quoted in pk_column_tuples]
-                create_table_sql += f",\n  PRIMARY KEY ({', '.join(sorted_pk_col_names)})"
-
-            create_table_sql += f"\n) ENGINE=InnoDB CHARACTER SET={MYSQL_CHARSET} COLLATE={MYSQL_COLLATION};"
-            mysql_cursor.execute(create_table_sql) # This is where the error occurred
-            print(f"  Table {mysql_safe_table_name} created.")
-
-            print(f"  Transferring data for table {mysql_safe_table_name}...")
-            select_cols_str_sqlite = ", ".join([f'"{c}"' for c in column_names_ordered_from_pragma])
-            sqlite_cursor.execute(f'SELECT {select_cols_str_sqlite} FROM "{table_name}";')
-
-            insert_cols_str_mysql = ", ".join([f"`{c}`" for c in column_names_ordered_from_pragma])
-            placeholders_str = ", ".join(["%s"] * len(column_names_ordered_from_pragma))
-            insert_sql_template = f'INSERT INTO {mysql_safe_table_name} ({insert_cols_str_mysql}) VALUES ({placeholders_str});'
-
-            rows_processed = 0
-            for sqlite_row_tuple in sqlite_cursor:
-                mysql_row_values = list(sqlite_row_tuple)
-                for i, col_name in enumerate(column_names_ordered_from_pragma):
-                    original_sqlite_type = ""
-                    is_pk_col_runtime = False
-                    for sch_col_info in schema_info:
-                        if sch_col_info[1] == col_name:
-                            original_sqlite_type = sch_col_info[2]
-                            is_pk_col_runtime = (sch_col_info[5] > 0)
-                            break
-
-                    mysql_target_type_for_col = get_mysql_column_type(original_sqlite_type, col_name, table_name, is_pk_col_runtime)
-                    current_val = mysql_row_values[i]
-
-                    if mysql_target_type_for_col == "TINYINT(1)":
-                        if current_val == 1 or (isinstance(current_val, str) and current_val.lower() in ['true', 't', '1']):
-                            mysql_row_values[i] = 1
-                        elif current_val == 0 or (isinstance(current_val, str) and current_val.lower() in ['false', 'f', '0']):
-                            mysql_row_values[i] = 0
-                        elif current_val is None:
-                            mysql_row_values[i] = None
-
-                    elif mysql_target_type_for_col.upper().startswith("TIMESTAMP") or \
-                         mysql_target_type_for_col.upper().startswith("DATETIME"):
-                        mysql_row_values[i] = preprocess_mysql_datetime_string(current_val)
-
-                    elif mysql_target_type_for_col == "JSON" and isinstance(current_val, bytes):
-                        try:
-                            try: decoded_string = current_val.decode('utf-8')
-                            except UnicodeDecodeError:
-                                print(f"Warning: UTF-8 decode failed for JSON bytes in {table_name}.{col_name}. Trying with 'replace'. Value: {repr(current_val)}")
-                                decoded_string = current_val.decode('utf-8', 'replace')
-                            mysql_row_values[i] = decoded_string
-                        except Exception as e_json_decode:
-                             print(f"Error decoding bytes for JSON in {table_name}.{col_name}: {e_json_decode}. Value: {repr(current_val)}. Setting to NULL.")
-                             mysql_row_values[i] = None
-
-                    elif isinstance(current_val, bytes) and \
-                         ("TEXT" in mysql_target_type_for_col.upper() or "CHAR" in mysql_target_type_for_col.upper()):
-                        try:
-                            mysql_row_values[i] = current_val.decode('utf-8', 'replace')
-                        except Exception as e_text_decode:
-                            print(f"Error decoding bytes for TEXT/CHAR in {table_name}.{col_name}: {e_text_decode}. Value: {repr(current_val)}. Setting to NULL.")
-                            mysql_row_values[i] = None
-
-                try:
-                    mysql_cursor.execute(insert_sql_template, tuple(mysql_row_values))
-                    rows_processed += 1
-                except mysql.connector.Error as e_insert:
-                    print(f"\n!!! ERROR inserting row into table {mysql_safe_table_name} !!!")
-                    print(f"    SQL Template: {insert_sql_template}")
-                    print(f"    Problematic MySQL-bound values (len {len(mysql_row_values)}): {mysql_row_values}")
-                    print(f"    Original SQLite row values (len {len(sqlite_row_tuple)}): {sqlite_row_tuple}")
-                    print(f"    Column names for insert (len {len(column_names_ordered_from_pragma)}): {column_names_ordered_from_pragma}")
-                    print(f"    Insert error details: {e_insert} (Code: {e_insert.errno})")
-                    if e_insert.errno == errorcode.ER_TRUNCATED_WRONG_VALUE_FOR_FIELD:
-                        print("    This might be a data type mismatch or encoding issue for a specific field.")
-                    mysql_conn.rollback()
-                    raise
-
-            mysql_conn.commit()
-            print(f"  Transferred {rows_processed} rows for table {mysql_safe_table_name}.")
-            if table_has_auto_increment_id:
-                migrated_tables_info.append((table_name, True))
-            else:
-                migrated_tables_info.append((table_name, False))
+            table_indexes_created = create_mysql_indexes(mysql_cursor, table_spec)
+            if table_indexes_created is not None:
+                indexes_created += table_indexes_created
+                journal_set_table_status(checkpoint_journal, table_spec['table_name'], 'indexed')
+        print(f"  Created {indexes_created} indexes.")
+        record_phase(run_metrics, "create indexes", time.perf_counter() - phase_started_at)
+        if VERIFY_AFTER_MIGRATION:
+            verify_migration(sqlite_conn, sqlite_db_path, mysql_conn, table_specs, run_metrics)
+        print_phase_timings(run_metrics)
+
+        migrated_tables_info = [(spec['table_name'], spec['has_auto_increment_id']) for spec in table_specs]
 
         print("\nMigration process completed successfully.")
         return migrated_tables_info
@@ -360,26 +2647,173 @@ def migrate_data():
             print("MySQL connection closed after migration.")
         if 'sqlite_cursor' in locals() and sqlite_cursor: sqlite_cursor.close()
         if 'sqlite_conn' in locals() and sqlite_conn: sqlite_conn.close(); print("SQLite connection closed.")
-        if os.path.exists(temp_sqlite_db_path):
-            try:
-                os.remove(temp_sqlite_db_path)
-                print(f"Temporary SQLite database '{temp_sqlite_db_path}' removed.")
-            except OSError as e_remove:
-                print(f"Error removing temp SQLite DB '{temp_sqlite_db_path}': {e_remove}")
+        if checkpoint_journal: checkpoint_journal.close()
+        remove_temp_sqlite_db(temp_sqlite_db_path)
+
+
+def sync_data(run_metrics=None):
+    """--sync: copies the source changes since the last full migration or sync pass into MySQL.
+
+    Only tables fully migrated according to the checkpoint journal are synced. The source is
+    opened without immutable=1, so Cloudreve may keep running until the final pass. Returns
+    [(table_name, has_auto_increment_id)] for reset_mysql_auto_increment, or [] on errors.
+    """
+    mysql_conn = None
+    sqlite_conn = None
+    checkpoint_journal = None
+    temp_sqlite_db_path = None
+    if not os.path.exists(CHECKPOINT_JOURNAL_FILE):
+        print(f"Error: Checkpoint journal '{CHECKPOINT_JOURNAL_FILE}' not found. Run a full migration before --sync.")
+        return []
+    try:
+        sqlite_conn, temp_sqlite_db_path = open_sqlite_source(run_metrics, immutable=False)
+        sqlite_cursor = sqlite_conn.cursor()
+        checkpoint_journal = open_checkpoint_journal(CHECKPOINT_JOURNAL_FILE)
+        print(f"Connecting to MySQL database '{MYSQL_DBNAME}' on {MYSQL_HOST}:{MYSQL_PORT}...")
+        mysql_conn = connect_mysql()
 
+        sqlite_cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
+        tables = [row[0] for row in sqlite_cursor.fetchall()]
+        print("\n--- Syncing changes since the last pass ---")
+        phase_started_at = time.perf_counter()
+        synced_table_specs = []
+        for table_name in tables:
+            if journal_get_table_status(checkpoint_journal, table_name) != 'indexed':
+                print(f"  Warning: `{table_name}` has not been fully migrated; skipping it (run a full migration or --resume).")
+                continue
+            table_spec = create_mysql_table(sqlite_cursor, None, table_name, recreate=False)
+            if table_spec is None:
+                continue
+            table_started_at = time.perf_counter()
+            rows_upserted, rows_deleted, new_sync_marks = sync_table(
+                sqlite_conn, mysql_conn, table_spec, journal_get_sync_marks(checkpoint_journal, table_name))
+            journal_save_sync_marks(checkpoint_journal, table_name, new_sync_marks)
+            synced_table_specs.append(table_spec)
+            print(f"  `{table_name}`: {rows_upserted} rows upserted, {rows_deleted} rows deleted "
+                  f"in {time.perf_counter() - table_started_at:.2f}s.")
+        record_phase(run_metrics, "delta sync", time.perf_counter() - phase_started_at)
+        print(f"Sync pass finished in {time.perf_counter() - phase_started_at:.2f}s.")
+        return [(spec['table_name'], spec['has_auto_increment_id']) for spec in synced_table_specs]
 
-def reset_mysql_auto_increment(processed_tables_info):
+    except mysql.connector.Error as db_err:
+        print(f"\n!!! MYSQL DATABASE ERROR OCCURRED: {db_err} !!!")
+        if mysql_conn and mysql_conn.is_connected(): mysql_conn.rollback()
+        traceback.print_exc()
+        return []
+    except sqlite3.Error as sqlite_err:
+        print(f"\n!!! SQLITE DATABASE ERROR OCCURRED: {sqlite_err} !!!")
+        traceback.print_exc()
+        return []
+    finally:
+        if mysql_conn and mysql_conn.is_connected(): mysql_conn.close()
+        if sqlite_conn: sqlite_conn.close()
+        if checkpoint_journal: checkpoint_journal.close()
+        remove_temp_sqlite_db(temp_sqlite_db_path)
+
+
+def verify_data(run_metrics=None):
+    """--verify: compares the existing MySQL tables with the SQLite source without changing either."""
+    mysql_conn = None
+    sqlite_conn = None
+    temp_sqlite_db_path = None
+    try:
+        sqlite_conn, temp_sqlite_db_path = open_sqlite_source(run_metrics)
+        sqlite_cursor = sqlite_conn.cursor()
+        sqlite_cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
+        tables = [row[0] for row in sqlite_cursor.fetchall()]
+        table_specs = [table_spec for table_spec in (create_mysql_table(sqlite_cursor, None, table_name, recreate=False)
+                                                     for table_name in tables) if table_spec is not None]
+        sqlite_cursor.close()
+        print(f"Connecting to MySQL database '{MYSQL_DBNAME}' on {MYSQL_HOST}:{MYSQL_PORT}...")
+        mysql_conn = connect_mysql()
+        sqlite_db_path = SQLITE_SOURCE_DB if temp_sqlite_db_path is None else temp_sqlite_db_path
+        return verify_migration(sqlite_conn, sqlite_db_path, mysql_conn, table_specs, run_metrics)
+    except (mysql.connector.Error, sqlite3.Error) as db_err:
+        print(f"\n!!! DATABASE ERROR DURING VERIFICATION: {db_err} !!!")
+        traceback.print_exc()
+        return False
+    finally:
+        if mysql_conn and mysql_conn.is_connected(): mysql_conn.close()
+        if sqlite_conn: sqlite_conn.close()
+        remove_temp_sqlite_db(temp_sqlite_db_path)
+
+
+def export_data(export_dir, run_metrics=None):
+    """--export: writes the converted schema and rows as a bundle of files; no MySQL connection is used.
+
+    Tables with an integer key are split like a parallel migration when MIGRATION_WORKERS > 1,
+    and the key ranges are exported by worker processes. Returns True if the bundle was written.
+    """
+    sqlite_conn = None
+    temp_sqlite_db_path = None
+    if run_metrics is None:
+        run_metrics = new_run_metrics()
+    try:
+        sqlite_conn, temp_sqlite_db_path = open_sqlite_source(run_metrics)
+        sqlite_db_path = SQLITE_SOURCE_DB if temp_sqlite_db_path is None else temp_sqlite_db_path
+        sqlite_cursor = sqlite_conn.cursor()
+        sqlite_cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
+        tables = [row[0] for row in sqlite_cursor.fetchall()]
+        os.makedirs(export_dir, exist_ok=True)
+        print(f"Exporting {len(tables)} tables to '{export_dir}' as {EXPORT_FORMAT.upper()} files...")
+
+        phase_started_at = time.perf_counter()
+        table_specs = []
+        for table_name in tables:
+            table_spec = create_mysql_table(sqlite_cursor, None, table_name, recreate=False)
+            if table_spec is not None:
+                export_table_schema(sqlite_cursor, table_spec, export_dir)
+                table_specs.append(table_spec)
+        record_phase(run_metrics, "export schema", time.perf_counter() - phase_started_at)
+
+        phase_started_at = time.perf_counter()
+        export_tasks = []
+        for table_spec in table_specs:
+            key_ranges = [(None, None)]
+            if MIGRATION_WORKERS > 1 and table_spec['integer_key_column']:
+                key_ranges = plan_key_ranges(sqlite_cursor, table_spec, PARALLEL_CHUNK_ROWS)
+            export_tasks.extend((table_spec, key_range, range_index) for range_index, key_range in enumerate(key_ranges))
+        exported_files = []
+        if MIGRATION_WORKERS > 1:
+            print(f"Exporting {len(export_tasks)} tasks with {MIGRATION_WORKERS} worker processes...")
+            with concurrent.futures.ProcessPoolExecutor(max_workers=MIGRATION_WORKERS, initializer=_init_transfer_worker,
+                                                        initargs=(PROFILE_OUTPUT_DIR,)) as executor:
+                futures = [executor.submit(_export_table_worker, sqlite_db_path, table_spec, export_dir, key_range, range_index)
+                           for table_spec, key_range, range_index in export_tasks]
+                export_results = [future.result() for future in concurrent.futures.as_completed(futures)]
+        else:
+            export_results = [export_table_data(sqlite_conn, table_spec, export_dir, "  ", key_range, range_index)
+                              for table_spec, key_range, range_index in export_tasks]
+        for table_metrics, table_files in export_results:
+            merge_table_metrics(run_metrics, table_metrics)
+            exported_files.extend((table_metrics['table_name'], relative_path, rows) for relative_path, rows in table_files)
+        exported_files.sort(key=lambda exported: exported[1])
+        write_export_bundle_index(export_dir, table_specs, exported_files, run_metrics)
+        record_phase(run_metrics, "export data", time.perf_counter() - phase_started_at)
+        print_table_timing_summary(run_metrics)
+        print_phase_timings(run_metrics)
+        print(f"\nExport bundle written to '{export_dir}' ({len(exported_files)} data files). "
+              f"Load it on the database host with: MYSQL_CMD=\"mysql -u USER -p DB\" {os.path.join(export_dir, 'load.sh')} [jobs]")
+        return True
+    except (sqlite3.Error, OSError) as export_err:
+        print(f"\n!!! ERROR DURING EXPORT: {export_err} !!!")
+        traceback.print_exc()
+        return False
+    finally:
+        if sqlite_conn: sqlite_conn.close()
+        remove_temp_sqlite_db(temp_sqlite_db_path)
+
+
+def reset_mysql_auto_increment(processed_tables_info, run_metrics=None):
     if not processed_tables_info:
         print("No tables processed or no auto_increment info, skipping auto_increment reset.")
         return
 
     print("\n--- Attempting to reset MySQL AUTO_INCREMENT values for relevant tables ---")
+    phase_started_at = time.perf_counter()
     mysql_conn_reset = None
     try:
-        mysql_conn_reset = mysql.connector.connect(
-            host=MYSQL_HOST, port=MYSQL_PORT, user=MYSQL_USER,
-            password=MYSQL_PASSWORD, database=MYSQL_DBNAME, charset=MYSQL_CHARSET
-        )
+        mysql_conn_reset = connect_mysql()
         mysql_cursor_reset = mysql_conn_reset.cursor()
 
         for table_name, has_auto_inc_id in processed_tables_info:
@@ -409,14 +2843,56 @@ def reset_mysql_auto_increment(processed_tables_info):
         if 'mysql_conn_reset' in locals() and mysql_conn_reset and mysql_conn_reset.is_connected():
             mysql_conn_reset.close()
             print("MySQL connection closed after auto_increment reset.")
+        record_phase(run_metrics, "auto_increment reset", time.perf_counter() - phase_started_at)
 
 if __name__ == '__main__':
-    if not os.path.exists(SQLITE_DUMP_FILE):
+    arg_parser = argparse.ArgumentParser(description="Migrate a Cloudreve v4 SQLite database to MySQL.")
+    mode_group = arg_parser.add_mutually_exclusive_group()
+    mode_group.add_argument('--resume', action='store_true',
+                            help=f"continue an interrupted migration using '{CHECKPOINT_JOURNAL_FILE}' "
+                                 "instead of dropping and recreating every table")
+    mode_group.add_argument('--sync', action='store_true',
+                            help="after a full migration, copy only rows added, changed or deleted in the "
+                                 "source since the last pass (for a short final cutover)")
+    mode_group.add_argument('--verify', action='store_true',
+                            help="only compare the MySQL tables with the SQLite source (row counts and "
+                                 "chunked checksums); nothing is migrated or changed")
+    mode_group.add_argument('--export', metavar='DIR',
+                            help="write the converted schema and data as a (gzipped) SQL or TSV file bundle with a "
+                                 "load.sh to DIR instead of connecting to MySQL")
+    arg_parser.add_argument('--profile', metavar='DIR',
+                            help="write cProfile stats of each table's transfer loop to DIR (one .prof file per table or key range)")
+    cli_args = arg_parser.parse_args()
+    if cli_args.profile:
+        os.makedirs(cli_args.profile, exist_ok=True)
+        PROFILE_OUTPUT_DIR = cli_args.profile
+
+    if SQLITE_SOURCE_DB and not use_direct_sqlite_source():
+        print(f"Warning: SQLite database '{SQLITE_SOURCE_DB}' not found. Falling back to dump file '{SQLITE_DUMP_FILE}'.")
+    if not use_direct_sqlite_source() and not os.path.exists(SQLITE_DUMP_FILE):
         print(f"Error: SQLite dump file '{SQLITE_DUMP_FILE}' not found.")
+    elif cli_args.verify:
+        run_metrics = new_run_metrics()
+        verification_passed = verify_data(run_metrics)
+        if METRICS_REPORT_FILE:
+            write_metrics_report(run_metrics, METRICS_REPORT_FILE)
+        sys.exit(0 if verification_passed else 1)
+    elif cli_args.export:
+        run_metrics = new_run_metrics()
+        export_written = export_data(cli_args.export, run_metrics)
+        if METRICS_REPORT_FILE:
+            write_metrics_report(run_metrics, METRICS_REPORT_FILE)
+        sys.exit(0 if export_written else 1)
     else:
-        processed_tables_info_list = migrate_data()
+        run_metrics = new_run_metrics()
+        if cli_args.sync:
+            processed_tables_info_list = sync_data(run_metrics)
+        else:
+            processed_tables_info_list = migrate_data(resume=cli_args.resume, run_metrics=run_metrics)
         # Ensure reset is called even if processed_tables_info_list is empty, as long as migration ran
         if processed_tables_info_list is not None:
-            reset_mysql_auto_increment(processed_tables_info_list)
+            reset_mysql_auto_increment(processed_tables_info_list, run_metrics)
         else:
-            print("Migration failed very early or did not run, skipping auto_increment reset.")
\ No newline at end of file
+            print("Migration failed very early or did not run, skipping auto_increment reset.")
+        if METRICS_REPORT_FILE:
+            write_metrics_report(run_metrics, METRICS_REPORT_FILE)
\ No newline at end of file